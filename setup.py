@@ -10,9 +10,8 @@ setup(
         "numpy",
         "matplotlib",
         "gurobipy",
+        "scipy",
         "ortools",
-        "pandas",
-        "tkinter",
     ],
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -0,0 +1,25 @@
+# Numba-compiled kernels for instance construction
+import math
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional, callers fall back to NumPy
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def distmat(x, y, out):
+        """Fill out[i, j] with the Euclidean distance between points i and j"""
+        n = x.size
+        for i in prange(n):
+            for j in range(n):
+                dx = x[i] - x[j]
+                dy = y[i] - y[j]
+                out[i, j] = math.sqrt(dx * dx + dy * dy)
+        return out
+
+    # Warm the JIT cache at import to avoid first-call compilation latency
+    distmat(np.zeros(1), np.zeros(1), np.empty((1, 1), dtype=np.float32))
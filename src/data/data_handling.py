@@ -1,6 +1,86 @@
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
-import pandas as pd
+from src.data._kernels import NUMBA_AVAILABLE
+
+if NUMBA_AVAILABLE:
+    from src.data._kernels import distmat
+
+
+def _compute_distance_matrix(P):
+    '''
+    Compute the dense Euclidean distance matrix between all locations.
+    
+    Uses a fused Numba kernel when available; otherwise expands
+    ||p - q||^2 = p.p + q.q - 2 p.q so the pairwise term is a single
+    BLAS matrix product instead of explicit per-pair differences.
+    
+    Parameters:
+    ------
+    P: np.ndarray
+        (n, 2) array of location coordinates
+    
+    Returns:
+    -----
+        np.ndarray, (n, n) float32 matrix indexed c[i, j]
+    '''
+    P = np.asarray(P, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        out = np.empty((len(P), len(P)), dtype=np.float32)
+        return distmat(np.ascontiguousarray(P[:, 0]), np.ascontiguousarray(P[:, 1]), out)
+    
+    # The expansion is evaluated in float64 to avoid cancellation error
+    # between nearby points, and only the result is downcast
+    sq = (P * P).sum(axis=1)
+    D2 = sq[:, None] + sq[None, :] - 2 * (P @ P.T)
+    np.maximum(D2, 0, out=D2)
+    np.fill_diagonal(D2, 0)
+    return np.sqrt(D2).astype(np.float32)
+
+
+def scaled_distance_matrix(c):
+    '''
+    Integer arc costs for OR-Tools: distances scaled by 100 and truncated.
+    '''
+    return (np.asarray(c) * 100).astype(np.int64)
+
+
+def _arc_index(n_nodes):
+    '''
+    Return the arc set (i, j), i != j, as two contiguous integer arrays
+    derived from an off-diagonal mask instead of a list of tuples.
+    Node ids are stored as int16 whenever they fit, int32 otherwise.
+    '''
+    dtype = np.int16 if n_nodes <= np.iinfo(np.int16).max else np.int32
+    ij = np.indices((n_nodes, n_nodes), dtype=dtype).reshape(2, -1)
+    mask = ij[0] != ij[1]
+    return ij[0][mask], ij[1][mask]
+
+
+def _load_cached_distance_matrix(cache_path, source_path, n_nodes):
+    '''
+    Memory-map a distance matrix previously cached next to an instance file.
+    Returns None if there is no cache, or it is stale, unreadable or has the wrong shape.
+    '''
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(source_path):
+        return None
+    
+    try:
+        c = np.load(cache_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None  # Corrupt or not a .npy file, recomputed like a missing cache
+    if c.shape != (n_nodes, n_nodes) or c.dtype != np.float32:
+        return None
+    return c
+
+
+def get_arcs(instance):
+    '''
+    Iterate over the arcs of an instance as (i, j) tuples of Python ints,
+    for callers (e.g. solver APIs) that need the legacy arc list.
+    '''
+    return zip(instance['A_i'].tolist(), instance['A_j'].tolist())
+
 
 def load_problem_instance(file_path):
     '''
@@ -13,11 +93,11 @@ def load_problem_instance(file_path):
     
     Returns:
     -----
-        dict, keys = N, V, A, c, Q, q, x_coords, y_coords, alpha, beta
+        dict, keys = N, V, A_i, A_j, c, Q, q, x_coords, y_coords, alpha, beta
     '''
     try:
-        # Read locations data
-        locations_df = pd.read_csv(file_path)
+        # Read locations data (columns: id, x_coord, y_coord, demand)
+        locations = np.loadtxt(file_path, delimiter=',', skiprows=1, usecols=(1, 2, 3), ndmin=2)
         
         # Extract capacity and emissions parameters from metadata
         meta_params = {}
@@ -30,35 +110,41 @@ def load_problem_instance(file_path):
         vehicle_capacity = int(meta_params.get('capacity', 10))
         
         # Process locations data
-        n_shops = len(locations_df) - 1  # Excluding depot
+        n_shops = len(locations) - 1  # Excluding depot
         
         # Extract coordinates
-        x_coords = locations_df['x_coord'].values
-        y_coords = locations_df['y_coord'].values
+        x_coords = locations[:, 0]
+        y_coords = locations[:, 1]
         
-        # Extract demands
-        demands = {}
-        for i, demand in enumerate(locations_df['demand'].values):
-            if i > 0:  # Skip depot
-                demands[i] = demand
+        # Extract demands as an array indexed by node (0 demand for depot)
+        demands = locations[:, 2].astype(np.int32)
+        demands[0] = 0
         
         # N is the set of shops (excluding depot)
         N = np.arange(1, n_shops+1)
         # V is the set of all locations (including depot at 0)
         V = np.arange(0, n_shops+1)
-        # A is the set of all arcs
-        A = [(i, j) for i in V for j in V if i != j]
+        # A is the set of all arcs, stored as origin/destination index arrays
+        A_i, A_j = _arc_index(len(V))
         
-        # c is the cost (distance) between locations
-        c = {(i, j): np.hypot(x_coords[i]-x_coords[j], y_coords[i]-y_coords[j]) 
-             for i, j in A}
+        # c is the cost (distance) between locations, cached on disk so
+        # reloading the same instance skips the O(n^2) computation
+        cache_path = os.path.splitext(file_path)[0] + '_dist.npy'
+        c = _load_cached_distance_matrix(cache_path, file_path, len(V))
+        if c is None:
+            c = _compute_distance_matrix(np.stack([x_coords, y_coords], axis=1))
+            try:
+                np.save(cache_path, c)
+            except OSError:
+                pass  # Read-only location, the cache is only an optimization
         
         result = {
             'x_coords': x_coords, 
             'y_coords': y_coords,
             'N': N,
             'V': V, 
-            'A': A, 
+            'A_i': A_i,
+            'A_j': A_j,
             'c': c, 
             'Q': vehicle_capacity, 
             'q': demands
@@ -91,37 +177,40 @@ def create_random_problem_instance(n_shops, vehicle_capacity, random_state=None)
     
     Returns:
     -----
-        dict, keys = N, V, A, c, Q, q, x_coords, y_coords
+        dict, keys = N, V, A_i, A_j, c, Q, q, x_coords, y_coords
     '''
-    rand_gen = np.random.RandomState(seed=random_state)
+    rand_gen = np.random.default_rng(np.random.SeedSequence(random_state))
     
-    # Shop locations (randomly generated) + 1 for the depot
-    x_coords = rand_gen.random(size=n_shops+1) * 200
-    y_coords = rand_gen.random(size=n_shops+1) * 100
+    # Shop locations (randomly generated) + 1 for the depot, drawn in one call
+    coords = rand_gen.random(size=(2, n_shops+1))
+    coords[0] *= 200
+    coords[1] *= 100
+    x_coords, y_coords = coords
     
     # N is the set of shops (excluding depot)
     N = np.arange(1, n_shops+1)
     # V is the set of all locations (including depot at 0)
     V = np.arange(0, n_shops+1)
-    # A is the set of all arcs
-    A = [(i, j) for i in V for j in V if i != j]
+    # A is the set of all arcs, stored as origin/destination index arrays
+    A_i, A_j = _arc_index(len(V))
     
     # c is the cost (distance) between locations
-    c = {(i, j): np.hypot(x_coords[i]-x_coords[j], y_coords[i]-y_coords[j]) 
-         for i, j in A}
+    c = _compute_distance_matrix(np.stack([x_coords, y_coords], axis=1))
     
     # Q is the vehicle capacity
     Q = vehicle_capacity
     
     # q is the demand at each shop (random number of items to pick up)
-    q = {i: rand_gen.randint(1, 3) for i in N}  # Each shop has 1-3 units to return
+    q = rand_gen.integers(1, 3, size=n_shops+1).astype(np.int32)  # Each shop has 1-3 units to return
+    q[0] = 0  # No demand at the depot
     
     return {
         'x_coords': x_coords, 
         'y_coords': y_coords,
         'N': N,
         'V': V, 
-        'A': A, 
+        'A_i': A_i,
+        'A_j': A_j,
         'c': c, 
         'Q': Q, 
         'q': q
@@ -163,18 +252,21 @@ def save_problem_instance(instance, output_path):
         Path to save the CSV file
     '''
     try:
-        # Create dataframe for locations
-        data = {
-            'id': range(len(instance['x_coords'])),
-            'x_coord': instance['x_coords'],
-            'y_coord': instance['y_coords'],
-            'demand': [0] + [instance['q'].get(i, 0) for i in instance['N']]  # 0 demand for depot
-        }
+        q = instance['q']
+        if isinstance(q, dict):  # Legacy {node: demand} instances
+            q = np.array([q.get(i, 0) for i in range(len(instance['x_coords']))])
         
-        locations_df = pd.DataFrame(data)
+        # Stack location columns
+        locations = np.column_stack([
+            np.arange(len(instance['x_coords'])),
+            instance['x_coords'],
+            instance['y_coords'],
+            np.concatenate(([0], q[1:]))  # 0 demand for depot
+        ])
         
         # Save locations to CSV
-        locations_df.to_csv(output_path, index=False)
+        np.savetxt(output_path, locations, fmt=['%d', '%s', '%s', '%d'], delimiter=',',
+                   header='id,x_coord,y_coord,demand', comments='')
         
         # Save metadata (vehicle capacity) to a separate text file
         with open(output_path.replace('.csv', '_meta.txt'), 'w') as f:
@@ -199,19 +291,23 @@ def create_sample_instances():
     # Create directory if it doesn't exist
     os.makedirs('instances', exist_ok=True)
     
-    # Small instance (10 shops)
-    small_instance = create_random_problem_instance(n_shops=10, vehicle_capacity=10, random_state=42)
-    add_emissions_parameters(small_instance)  # Add default emissions parameters
-    save_problem_instance(small_instance, 'instances/small_instance.csv')
+    # (file, n_shops, vehicle_capacity, random_state, alpha, beta) per sample instance
+    samples = [
+        ('instances/small_instance.csv', 10, 10, 42, 0.15, 0.02),   # Small instance (10 shops)
+        ('instances/medium_instance.csv', 20, 15, 43, 0.18, 0.025), # Medium instance (20 shops)
+        ('instances/large_instance.csv', 50, 20, 44, 0.2, 0.03),    # Large instance (50 shops)
+    ]
     
-    # Medium instance (20 shops)
-    medium_instance = create_random_problem_instance(n_shops=20, vehicle_capacity=15, random_state=43)
-    add_emissions_parameters(medium_instance, alpha=0.18, beta=0.025)  # Different parameters
-    save_problem_instance(medium_instance, 'instances/medium_instance.csv')
-    
-    # Large instance (50 shops)
-    large_instance = create_random_problem_instance(n_shops=50, vehicle_capacity=20, random_state=44)
-    add_emissions_parameters(large_instance, alpha=0.2, beta=0.03)  # Different parameters 
-    save_problem_instance(large_instance, 'instances/large_instance.csv')
+    # Instances are independent, and NumPy releases the GIL while building them
+    with ThreadPoolExecutor(max_workers=len(samples)) as executor:
+        futures = {
+            executor.submit(create_random_problem_instance, n_shops=n_shops,
+                            vehicle_capacity=capacity, random_state=seed): (path, alpha, beta)
+            for path, n_shops, capacity, seed, alpha, beta in samples
+        }
+        for future in as_completed(futures):
+            path, alpha, beta = futures[future]
+            instance = add_emissions_parameters(future.result(), alpha=alpha, beta=beta)
+            save_problem_instance(instance, path)
     
     print("Sample instances created in 'instances' directory")
\ No newline at end of file
@@ -4,11 +4,11 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import argparse
+import importlib
 
 # Import modules from our project
 from src.data.data_handling import create_sample_instances
-from src.ui.cli import run_cli
-from src.ui.gui import run_gui
+from src.models.model_factory import Method
 
 def main():
     parser = argparse.ArgumentParser(description='Solve Fashion Reverse Logistics CVRP')
@@ -19,8 +19,8 @@ def main():
     parser.add_argument('--seed', type=int, default=42, help='Random seed')
     parser.add_argument('--time-limit', type=int, default=30, help='Solver time limit in seconds (default: 30)')
     parser.add_argument('--create-samples', action='store_true', help='Create sample instances')
-    parser.add_argument('--method', type=str, choices=['exact', 'heuristic', 'ortools', 'ortools_emissions'], 
-                        default='exact',
+    parser.add_argument('--method', type=str, choices=[str(method) for method in Method], 
+                        default=str(Method.EXACT),
                         help='Solution method: exact (Gurobi), heuristic (ILS), ortools (CP), ortools_emissions (CP with CO2 objective)')
     parser.add_argument('--iterations', type=int, default=100, help='Max iterations for heuristic method')
     parser.add_argument('--alpha', type=float, default=0.15, help='Base CO₂ per km (kg/km)')
@@ -32,14 +32,13 @@ def main():
         create_sample_instances()
         return
         
-    # Launch GUI if requested
+    # Launch GUI if requested (tkinter is only imported when needed)
     if args.gui:
-        import sys
-        run_gui()
+        importlib.import_module('src.ui.gui').run_gui()
         return
     
     # Run command line interface
-    run_cli(args)
+    importlib.import_module('src.ui.cli').run_cli(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,388 @@
+# Numba-compiled kernels for the local search heuristic
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional, the kernels then run as plain Python
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def split_cost_numba(tour, C, Q, q):
+    """Cost of the routes obtained by splitting tour greedily by capacity"""
+    cost = 0.0
+    load = 0
+    prev = 0
+    for pos in range(len(tour)):
+        node = tour[pos]
+        if node == 0:
+            continue
+        if load + q[node] > Q:
+            cost += C[prev, 0]
+            prev = 0
+            load = 0
+        cost += C[prev, node]
+        load += q[node]
+        prev = node
+    return cost + C[prev, 0]
+
+
+@njit(cache=True)
+def split_tour_numba(tour, Q, q):
+    """
+    Greedy capacity split of tour written into pre-sized buffers. Returns the
+    routes back to back in one array, consecutive routes sharing the depot
+    between them, and the index of each route's leading depot plus the final one.
+    """
+    nodes = np.empty(2 * len(tour) + 1, dtype=np.int32)  # Worst case, one customer per route
+    route_starts = np.empty(len(tour) + 1, dtype=np.int32)
+    nodes[0] = 0
+    route_starts[0] = 0
+    cur = 1
+    n_routes = 0
+    load = 0
+    for pos in range(len(tour)):
+        node = tour[pos]
+        if node == 0:
+            continue
+        # Close the current route if it is not empty and the node does not fit
+        if load + q[node] > Q and cur > route_starts[n_routes] + 1:
+            nodes[cur] = 0
+            n_routes += 1
+            route_starts[n_routes] = cur
+            cur += 1
+            load = 0
+        nodes[cur] = node
+        cur += 1
+        load += q[node]
+
+    if cur > 1:
+        nodes[cur] = 0
+        n_routes += 1
+        route_starts[n_routes] = cur
+        cur += 1
+
+    return nodes[:cur].copy(), route_starts[:n_routes + 1].copy()
+
+
+@njit(cache=True)
+def route_positions_numba(tour, Q, q):
+    """Route index of each tour position in the capacity split, -1 at position 0"""
+    route_of = np.empty(len(tour), dtype=np.int64)
+    route_of[0] = -1
+    route_idx = 0
+    load = 0
+    for pos in range(1, len(tour)):
+        node_demand = q[tour[pos]]
+        if load + node_demand > Q:
+            route_idx += 1
+            load = node_demand
+        else:
+            load += node_demand
+        route_of[pos] = route_idx
+    return route_of
+
+
+@njit(cache=True)
+def nn_construct_numba(C, remaining, start, NN):
+    """
+    Nearest neighbour tour from the depot over the nodes flagged in remaining,
+    visiting start first unless it is the depot.
+
+    The next node is the first unvisited entry of the current node's sorted
+    neighbour list NN, so each step is O(k). The full O(n) row scan only runs
+    once all k neighbours have been visited.
+    """
+    remaining = remaining.copy()
+    tour = np.empty(remaining.sum() + 1, dtype=np.int64)
+    tour[0] = 0
+    size = 1
+    current = start
+    if start != 0:
+        remaining[start] = False
+        tour[1] = start
+        size = 2
+
+    while size < len(tour):
+        best_node = -1
+        for k in range(NN.shape[1]):
+            if remaining[NN[current, k]]:
+                best_node = NN[current, k]
+                break
+
+        if best_node < 0:
+            best_cost = np.inf
+            for node in range(len(remaining)):
+                if remaining[node] and C[current, node] < best_cost:
+                    best_cost = C[current, node]
+                    best_node = node
+
+        tour[size] = best_node
+        size += 1
+        remaining[best_node] = False
+        current = best_node
+
+    return tour
+
+
+@njit(cache=True)
+def route_costs_numba(tour, C, route_of):
+    """
+    First tour position of each route in the capacity split, and the total
+    cost of the routes from each one to the end (one extra 0 entry at the end)
+    """
+    n_routes = route_of[len(tour) - 1] + 1
+    first_pos = np.empty(n_routes, dtype=np.int64)
+    route_cost = np.zeros(n_routes)
+    prev = 0
+    for pos in range(1, len(tour)):
+        r = route_of[pos]
+        if r != route_of[pos - 1]:
+            first_pos[r] = pos
+            if r > 0:
+                route_cost[r - 1] += C[prev, 0]
+            prev = 0
+        route_cost[r] += C[prev, tour[pos]]
+        prev = tour[pos]
+    if n_routes > 0:
+        route_cost[n_routes - 1] += C[prev, 0]
+
+    cost_from = np.zeros(n_routes + 1)
+    for r in range(n_routes - 1, -1, -1):
+        cost_from[r] = cost_from[r + 1] + route_cost[r]
+    return first_pos, cost_from
+
+
+@njit(cache=True)
+def emissions_matrix_numba(C, load, alpha, beta):
+    """
+    Arc emissions C[i, j] * (alpha + beta * load[i]) scaled by 100 and
+    truncated to int64, written straight into the integer matrix
+    """
+    n = C.shape[0]
+    emissions = np.empty((n, n), dtype=np.int64)
+    for i in range(n):
+        factor = (alpha + beta * load[i]) * 100
+        for j in range(n):
+            emissions[i, j] = np.int64(C[i, j] * factor)
+    return emissions
+
+
+@njit(cache=True)
+def _reversal_split_cost(tour, C, Q, q, route_of, first_pos, cost_from, s, e):
+    """
+    Split cost of tour with tour[s:e + 1] reversed, without building it.
+
+    Routes closed before the route holding s keep their cost, unless s starts
+    a route and the previous one could now take its first node. After e, the
+    scan stops as soon as the new split opens a route where the current split
+    already does, then the remaining routes are identical and cached too.
+    """
+    n = len(tour)
+    r = route_of[s]
+    if s == first_pos[r] and r > 0:
+        r -= 1
+    cost = cost_from[0] - cost_from[r]
+    load = 0
+    prev = 0
+    for pos in range(first_pos[r], n):
+        node = tour[s + e - pos] if s <= pos <= e else tour[pos]
+        if load + q[node] > Q:
+            if pos > e and route_of[pos] != route_of[pos - 1]:
+                return cost + C[prev, 0] + cost_from[route_of[pos]]
+            cost += C[prev, 0]
+            prev = 0
+            load = 0
+        cost += C[prev, node]
+        load += q[node]
+        prev = node
+    return cost + C[prev, 0]
+
+
+@njit(cache=True)
+def _try_reversal(tour, route_of, first_pos, cost_from, C, Q, q, s, e, best_cost):
+    """
+    Reverse tour[s:e + 1] in place if that lowers the split cost, returning
+    whether it did and the new cost. route_of is kept up to date, the route
+    cost cache is left for the caller to rebuild.
+    """
+    n = len(tour)
+    r = route_of[s]
+    if route_of[e] == r and (r == 0 or s > first_pos[r]):
+        # The split is unchanged, only the edges at the segment ends move. This
+        # does not hold when the segment opens a route, its new first node
+        # might then fit in the previous route
+        prev_node = tour[s - 1] if route_of[s - 1] == route_of[s] else 0
+        next_node = tour[e + 1] if e + 1 < n and route_of[e + 1] == route_of[e] else 0
+        # Start from 0.0 so a float32 C is summed in float64
+        delta = (0.0 + C[prev_node, tour[e]] + C[tour[s], next_node]
+                 - C[prev_node, tour[s]] - C[tour[e], next_node])
+        if delta >= -1e-9:
+            return False, best_cost
+        tour[s:e + 1] = tour[s:e + 1][::-1].copy()
+        return True, best_cost + delta
+
+    # The reversal moves nodes across routes, so the affected routes are re-split
+    new_cost = _reversal_split_cost(tour, C, Q, q, route_of, first_pos, cost_from, s, e)
+    if new_cost >= best_cost - 1e-9:
+        return False, best_cost
+    tour[s:e + 1] = tour[s:e + 1][::-1].copy()
+    route_of[:] = route_positions_numba(tour, Q, q)
+    return True, new_cost
+
+
+@njit(cache=True)
+def _two_opt_inplace(tour, C, Q, q, NN, max_iter):
+    """
+    2-opt with don't-look bits on a giant tour under the capacity split,
+    improving tour in place and returning its split cost.
+
+    Nodes wait in a queue, those whose outgoing edge is longest compared with
+    their nearest neighbour first. A node taken from the queue tries the
+    reversals that link it to one of its nearest neighbours NN, on either
+    side of it in the tour. After an improving move the nodes at both segment
+    ends are queued again, a node without one leaves the queue until a
+    later move touches it. The search stops when the queue is empty or after
+    max_iter * len(tour) moves.
+    """
+    n = len(tour)
+    best_cost = split_cost_numba(tour, C, Q, q)
+    route_of = route_positions_numba(tour, Q, q)
+    first_pos, cost_from = route_costs_numba(tour, C, route_of)
+
+    # Tour position of each node, kept in step with the reversals
+    pos = np.full(C.shape[0], -1, dtype=np.int64)
+    for p in range(n):
+        pos[tour[p]] = p
+
+    # Seed the queue by the expected gain of each node's outgoing edge
+    gain = np.zeros(n)
+    if NN.shape[1] > 0:
+        for p in range(n):
+            succ = tour[p + 1] if p + 1 < n else 0
+            gain[p] = C[tour[p], succ] - C[tour[p], NN[tour[p], 0]]
+    queue = np.empty(n, dtype=np.int64)
+    queued = np.zeros(C.shape[0], dtype=np.bool_)
+    order = np.argsort(-gain)
+    for k in range(n):
+        queue[k] = tour[order[k]]
+        queued[queue[k]] = True
+    head = 0
+    count = n
+
+    moves = 0
+    while count > 0 and moves < max_iter * n:
+        u = queue[head]
+        head = (head + 1) % n
+        count -= 1
+        queued[u] = False
+
+        for k in range(NN.shape[1]):
+            i = pos[u]
+            j = pos[NN[u, k]]
+            if j > i + 1:
+                s, e = i + 1, j  # New edge from u to the segment end
+            elif 0 <= j < i - 1:
+                s, e = j + 1, i  # New edge from the neighbour to u
+            else:
+                continue
+
+            applied, best_cost = _try_reversal(tour, route_of, first_pos, cost_from,
+                                               C, Q, q, s, e, best_cost)
+            if not applied:
+                continue
+            first_pos, cost_from = route_costs_numba(tour, C, route_of)
+
+            for p in range(s, e + 1):
+                pos[tour[p]] = p
+            moves += 1
+
+            # Wake the nodes at the segment ends, including u
+            for p in (s - 1, s, e, e + 1):
+                if p < n and not queued[tour[p]]:
+                    queue[(head + count) % n] = tour[p]
+                    queued[tour[p]] = True
+                    count += 1
+            break
+
+    return best_cost
+
+
+@njit(cache=True)
+def _perturb_inplace(tour, rng):
+    """Apply one random move to tour in place, never moving the depot at position 0"""
+    n = len(tour)
+    perturbation_type = rng.integers(0, 3)
+
+    if perturbation_type == 0:
+        # Random swaps, 20% of the nodes
+        num_swaps = max(1, int(n * 0.2))
+        pairs = rng.integers(1, n, size=(num_swaps, 2))
+        for k in range(num_swaps):
+            i, j = pairs[k, 0], pairs[k, 1]
+            tour[i], tour[j] = tour[j], tour[i]
+
+    elif perturbation_type == 1:
+        # Reversal of a random segment
+        if n > 3:
+            i = rng.integers(1, n - 2)
+            j = rng.integers(i + 1, n - 1)
+            tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+
+    elif perturbation_type == 2:
+        # Move one node to another position, a one-step rotation of the span
+        if n > 2:
+            i = rng.integers(1, n - 1)
+            j = rng.integers(1, n - 1)
+            if i < j:
+                node = tour[i]
+                tour[i:j] = tour[i + 1:j + 1].copy()
+                tour[j] = node
+            elif j < i:
+                node = tour[i]
+                tour[j + 1:i + 1] = tour[j:i].copy()
+                tour[j] = node
+
+    else:
+        # Shuffle a random segment
+        if n > 3:
+            i = rng.integers(1, n - 2)
+            j = rng.integers(i + 1, n - 1)
+            rng.shuffle(tour[i:j + 1])
+
+
+@njit(cache=True)
+def ils_iteration_numba(tour, C, Q, q, NN, max_iter, rng):
+    """
+    One ILS step in a single call: perturb a copy of tour with rng, improve it
+    with 2-opt and return it with its split cost. The cost comes out of the
+    2-opt bookkeeping, so the tour is not split again to price it.
+    """
+    tour = tour.copy()
+    _perturb_inplace(tour, rng)
+    if len(tour) < 3:
+        return tour, split_cost_numba(tour, C, Q, q)
+    return tour, _two_opt_inplace(tour, C, Q, q, NN, max_iter)
+
+
+def _warm_up():
+    """Compile the kernels on a tiny instance, so the first solve does not pay for it"""
+    C = np.zeros((3, 3), dtype=np.float32)
+    q = np.zeros(3, dtype=np.int16)
+    NN = np.zeros((3, 1), dtype=np.int32)
+    tour = nn_construct_numba(C, np.array([False, True, True]), 0, NN)
+    split_tour_numba(tour, 1, q)
+    ils_iteration_numba(tour, C, 1, q, NN, 1, np.random.default_rng(0))
+    emissions_matrix_numba(C, np.zeros(3), 0.15, 0.02)
+
+
+if NUMBA_AVAILABLE:
+    # Warm the JIT cache at import to avoid first-call compilation latency
+    _warm_up()
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import time
 import threading
+from collections import ChainMap
 from src.utils.solution import Solution
 
 class CVRPModel(ABC):
@@ -18,8 +19,10 @@ class CVRPModel(ABC):
         self.gap = None
         self.runtime = 0
         self.solution = {}  # Will store arc variables {(i,j): value}
+        self._solution_obj = None  # Cached Solution wrapper for self.solution
+        self._solution_dirty = True
         self.start_time = None
-        self._stop_requested = False
+        self._stop_event = threading.Event()  # Set by request_stop, possibly from another thread
         self._solve_thread = None
         self._solving = False
     
@@ -33,6 +36,18 @@ class CVRPModel(ABC):
         """Solve the model with a given time limit"""
         pass
     
+    def reset_search(self):
+        """Clear the results of a previous solve, keeping the built model for another run"""
+        self.status = None
+        self.solution_count = 0
+        self.objective_value = float('inf')
+        self.gap = None
+        self.runtime = 0
+        self.solution = {}
+        self._solution_dirty = True
+        self.start_time = None
+        self._stop_event.clear()
+    
     def start_timer(self):
         """Start the solution timer"""
         self.start_time = time.time()
@@ -47,12 +62,14 @@ class CVRPModel(ABC):
         return self.solution
     
     def get_solution_object(self):
-        """Return the current solution as a Solution object"""
-        # Ensure instance has method name
-        instance_copy = dict(self.instance) if self.instance else {}
-        instance_copy['method_name'] = self.name
+        """Return the current solution as a Solution object (cached until the next solve)"""
+        if self._solution_obj is None or self._solution_dirty:
+            # Overlay the method name instead of copying the whole instance
+            instance_view = ChainMap({'method_name': self.name}, self.instance or {})
+            self._solution_obj = Solution(instance_view, self.solution)
+            self._solution_dirty = False
         
-        return Solution(instance_copy, self.solution)
+        return self._solution_obj
     
     def get_objective_value(self):
         """Return the objective value of the current solution"""
@@ -72,14 +89,14 @@ class CVRPModel(ABC):
         
     def request_stop(self):
         """Request to stop the optimization process"""
-        self._stop_requested = True
+        self._stop_event.set()
         return True
         
     def should_stop(self):
         """Check if a stop has been requested"""
-        return self._stop_requested
+        return self._stop_event.is_set()
     
-    def solve_async(self, callback=None, **kwargs):
+    def solve_async(self, callback=None, error_callback=None, **kwargs):
         """
         Start solving in a background thread and call the callback when done
         
@@ -87,15 +104,24 @@ class CVRPModel(ABC):
         ----------
         callback : function
             Function to call when solving is complete, with the solution as argument
+        error_callback : function
+            Function to call with the exception if solving fails, without one it is re-raised
         **kwargs : dict
             Parameters to pass to the solve method
         """
-        self._stop_requested = False
+        self._stop_event.clear()
         self._solving = True
         
         def solve_thread_func():
-            self.solve(**kwargs)  # This stores the solution in self.solution
-            self._solving = False
+            try:
+                self.solve(**kwargs)  # This stores the solution in self.solution
+            except Exception as e:
+                if error_callback is None:
+                    raise
+                error_callback(e)
+                return None
+            finally:
+                self._solving = False
             if callback:
                 # Pass a Solution object to the callback, not just the arcs dictionary
                 callback(Solution(self.instance, self.solution))
@@ -1,4 +1,5 @@
-from gurobipy import Model, GRB, quicksum
+import numpy as np
+from gurobipy import Model, GRB
 from src.models.base_model import CVRPModel
 
 class GurobiModel(CVRPModel):
@@ -8,72 +9,130 @@ class GurobiModel(CVRPModel):
         super().__init__(name='fashion_reverse_logistics_gurobi', instance=instance)
         self.model = None
         self.x_vars = None
-        self.u_vars = None
     
     def build_model(self):
         """Build the Gurobi optimization model"""
         if not self.instance:
             raise ValueError("No instance data provided")
         
-        N = self.instance['N']
         V = self.instance['V']
-        A = self.instance['A']
         c = self.instance['c']
-        Q = self.instance['Q']
-        q = self.instance['q']
+        n = len(V)
         
         # Create new Gurobi model
         self.model = Model(self.name)
         
-        # x[i,j] = 1 if vehicle travels from i to j, 0 otherwise
-        self.x_vars = self.model.addVars(A, vtype=GRB.BINARY, name="x")
-        
-        # u[i] represents the cumulative load on the vehicle after visiting location i
-        self.u_vars = self.model.addVars(N, vtype=GRB.CONTINUOUS, name="u")
+        # x[i,j] = 1 if vehicle travels from i to j, 0 otherwise (diagonal fixed to 0)
+        self.x_vars = self.model.addMVar((n, n), vtype=GRB.BINARY, ub=1 - np.eye(n), name="x")
         
         # Objective: minimize total distance
-        self.model.modelSense = GRB.MINIMIZE
-        self.model.setObjective(quicksum(self.x_vars[a] * c[a] for a in A))
+        self.model.setObjective((self.x_vars * c).sum(), GRB.MINIMIZE)
         
         # Each shop must be visited exactly once
-        self.model.addConstrs(quicksum(self.x_vars[i, j] for j in V if j != i) == 1 for i in N)
-        self.model.addConstrs(quicksum(self.x_vars[i, j] for i in V if i != j) == 1 for j in N)
-        
-        # Load constraints with subtour elimination
-        self.model.addConstrs((self.x_vars[i, j] == 1) >> (self.u_vars[i] + q[j] == self.u_vars[j])
-                        for i, j in A if i != 0 and j != 0)
-        
-        # Load constraints
-        self.model.addConstrs(self.u_vars[i] >= q[i] for i in N)
-        self.model.addConstrs(self.u_vars[i] <= Q for i in N)
+        self.model.addConstr(self.x_vars[1:, :].sum(axis=1) == 1)
+        self.model.addConstr(self.x_vars[:, 1:].sum(axis=0) == 1)
         
+        # Subtour elimination and capacity are enforced lazily in the solve callback
         return self.model
     
-    def solve(self, time_limit=60, verbose=False):
-        """Solve the model with Gurobi"""
+    def _add_capacity_cuts(self, model):
+        """
+        Separate rounded capacity cuts x(S) <= |S| - ceil(q(S)/Q) on an integer solution.
+        
+        Each customer set S is either a subtour not connected to the depot or a
+        route leaving the depot; a cut is added if S is a subtour or its load
+        exceeds the vehicle capacity.
+        """
+        Q = self.instance['Q']
+        q = self.instance['q']
+        x_values = model.cbGetSolution(self.x_vars) > 0.5
+        succ = x_values.argmax(axis=1)  # Each node has exactly one outgoing arc
+        visited = np.zeros(len(succ), dtype=bool)
+        visited[0] = True
+        
+        # Routes start at the depot, whatever is left over forms subtours
+        starts = list(np.flatnonzero(x_values[0])) + list(range(1, len(succ)))
+        for start in starts:
+            if visited[start]:
+                continue
+            
+            S = []
+            node = start
+            while not visited[node]:
+                visited[node] = True
+                S.append(node)
+                node = succ[node]
+            
+            S = np.array(S)
+            min_vehicles = max(1, int(np.ceil(q[S].sum() / Q)))
+            is_subtour = node != 0
+            if is_subtour or min_vehicles > 1:
+                model.cbLazy(self.x_vars[S][:, S].sum() <= len(S) - min_vehicles)
+    
+    def warm_start(self, solution_dict):
+        """
+        Load a known solution (e.g. from the heuristic) as the MIP start
+        
+        Parameters:
+        ----------
+        solution_dict : dict
+            Dictionary of active arcs {(i,j): 1}
+        """
+        if not self.model:
+            self.build_model()
+        
+        start = np.zeros(self.x_vars.shape)
+        for (i, j), value in solution_dict.items():
+            start[i, j] = value
+        self.x_vars.Start = start
+    
+    def reset_search(self):
+        """Clear the previous results and Gurobi's solution information, keeping the model"""
+        super().reset_search()
+        if self.model:
+            self.model.reset()
+    
+    def solve(self, time_limit=60, verbose=False, warm_start=None, mip_gap=None, node_limit=None):
+        """
+        Solve the model with Gurobi, optionally warm-started from a solution dict
+        
+        Parameters:
+        ----------
+        mip_gap : float, optional
+            Relative optimality gap to stop at (Gurobi MIPGap), Gurobi's default if None
+        node_limit : float, optional
+            Branch-and-bound nodes to explore at most (Gurobi NodeLimit), unlimited if None
+        """
         if not self.model:
             self.build_model()
         
-        # Configure Gurobi parameters
-        if not verbose:
-            self.model.setParam('OutputFlag', 0)
+        if warm_start:
+            self.warm_start(warm_start)
         
+        # Configure Gurobi parameters, all set on every solve since they persist on a reused model
+        self.model.setParam('OutputFlag', 1 if verbose else 0)
         self.model.setParam('TimeLimit', time_limit)
+        self.model.setParam('MIPGap', 1e-4 if mip_gap is None else mip_gap)
+        self.model.setParam('NodeLimit', GRB.INFINITY if node_limit is None else node_limit)
+        self.model.setParam('LazyConstraints', 1)  # Required for cbLazy capacity cuts
         
-        # Set up a callback function to check for stop requests
+        # Set up a callback function to check for stop requests and add lazy cuts
         def terminate_callback(model, where):
             if where == GRB.Callback.MIP:
                 if self.should_stop():
                     if verbose:
                         print("Stop requested. Terminating optimization...")
                     model.terminate()
+            elif where == GRB.Callback.MIPSOL:
+                self._add_capacity_cuts(model)
         
         # Solve the model and measure time
-        self._stop_requested = False
+        self._stop_event.clear()
         self._solving = True
         self.start_timer()
         
         try:
+            self.model.update()  # Apply pending Start values before optimizing
             self.model.optimize(terminate_callback)
         except Exception as e:
             if verbose:
@@ -90,9 +149,9 @@ class GurobiModel(CVRPModel):
             self.objective_value = self.model.ObjVal
             self.gap = self.model.MIPGap
             
-            # Extract solution
-            for i, j in self.instance['A']:
-                if self.x_vars[i, j].x > 0.5:  # Binary variable with value close to 1
-                    self.solution[(i, j)] = 1
+            # Extract solution from a single batched read of the dense x values
+            x_values = self.x_vars.X
+            self.solution = {(int(i), int(j)): 1 for i, j in np.argwhere(x_values > 0.5)}
+            self._solution_dirty = True
         
         return self.solution
@@ -1,53 +1,128 @@
 import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
 import numpy as np
-from numpy.random import RandomState
 from src.models.base_model import CVRPModel
+from src.models._kernels import (ils_iteration_numba, nn_construct_numba, split_cost_numba,
+                                 split_tour_numba)
 
 class localSearch_model(CVRPModel):
     """CVRP solver implementation using Iterated Local Search heuristic"""
     
     def __init__(self, instance=None):
         super().__init__(name='fashion_reverse_logistics_heuristic', instance=instance)
-        self.best_routes = {}
+        self.nodes = np.zeros(1, dtype=np.int32)  # Best routes back to back, sharing the depot visits
+        self.route_starts = np.zeros(1, dtype=np.int32)  # Index in nodes of each route's leading depot, plus the final one
+        self._best_routes = None
         self.best_cost = float('inf')
         self.rand_gen = None
+        self.C = None  # Dense float32 distance matrix indexed C[i, j]
+        self.Q_arr = None  # Demand per node, 0 at the depot
+        self.NN = None  # Nearest neighbours of each node, closest first
+        self.n_neighbors = 20
+    
+    @property
+    def best_routes(self):
+        """Best routes as a dictionary {route_id: [0, ..., 0]}, rebuilt from the flat arrays on demand"""
+        if self._best_routes is None:
+            self._best_routes = self._routes_from_segments(self.nodes, self.route_starts)
+        return self._best_routes
+    
+    def _set_best_tour(self, tour, capacity, demands):
+        """Store the split of tour as the best routes"""
+        self.nodes, self.route_starts = self._split_tour(tour, capacity, demands)
+        self._best_routes = None
     
     def build_model(self):
-        """Prepare the model (mostly a placeholder for consistency)"""
+        """Prepare the dense cost and demand arrays used by the search"""
         if not self.instance:
             raise ValueError("No instance data provided")
+        
+        # Single precision distances and small integer demands halve the memory
+        # traffic of the search, costs are still accumulated in float64
+        self.C = np.ascontiguousarray(self.instance['c'], dtype=np.float32)
+        q = np.asarray(self.instance['q'])
+        q_dtype = np.int16 if q.max(initial=0) <= np.iinfo(np.int16).max else np.int32
+        self.Q_arr = q.astype(q_dtype)
+        
+        # Candidate lists for 2-opt, excluding each node itself
+        k = min(self.n_neighbors, len(self.C) - 1)
+        dist = self.C.copy()
+        np.fill_diagonal(dist, np.inf)
+        self.NN = np.argsort(dist, axis=1, kind='stable')[:, :k].astype(np.int32)
         return self
     
-    def solve(self, time_limit=60, iterations=100, random_state=None, verbose=False):
-        """Solve using Iterated Local Search heuristic"""
-        self._stop_requested = False
+    def solve(self, time_limit=60, iterations=100, random_state=None, verbose=False, n_workers=1):
+        """
+        Solve using Iterated Local Search heuristic
+        
+        Parameters:
+        ----------
+        n_workers : int
+            Number of independent ILS runs executed in parallel processes, each
+            with its own seed and the full iteration and time budget. The best
+            run is kept. With a single worker the search runs in this process
+            and honours stop requests.
+        """
+        if self.C is None:
+            self.build_model()
+        
+        self._stop_event.clear()
         self._solving = True
         self.start_timer()
-        self.rand_gen = RandomState(random_state)
         
         if verbose:
             print(f"Starting heuristic solver with max {iterations} iterations and {time_limit}s time limit")
         
+        if n_workers > 1:
+            best_tour, self.best_cost, iteration = self._solve_parallel(
+                time_limit, iterations, random_state, n_workers)
+            self._set_best_tour(best_tour, self.instance['Q'], self.Q_arr)
+        else:
+            self.rand_gen = np.random.default_rng(random_state)
+            _, _, iteration = self._iterated_local_search(time_limit, iterations, verbose)
+        
+        # Update solution and model status
+        self.solution = self._segments_to_arcs(self.nodes)
+        self._solution_dirty = True
+        self.objective_value = self.best_cost
+        self.solution_count = 1
+        self.status = 2  # Solution found
+        self.stop_timer()
+        self._solving = False
+        
+        if verbose:
+            print(f"\nHeuristic solution completed:")
+            print(f"Final solution cost: {self.best_cost:.2f}")
+            print(f"Number of routes: {len(self.route_starts) - 1}")
+            print(f"Solver running time: {self.runtime:.2f} seconds")
+            print(f"Number of iterations: {iteration}")
+        
+        return self.solution
+    
+    def _iterated_local_search(self, time_limit, iterations, verbose=False):
+        """Run the ILS loop with self.rand_gen, returning the best tour, its cost and the iterations run"""
         # Extract instance data
         N = list(self.instance['N'])
-        V = self.instance['V']
-        c = self.instance['c']
+        c = self.C
         Q = self.instance['Q']
-        q = self.instance['q']
+        q = self.Q_arr
         
-        # Initialize solution using nearest neighbor heuristic
+        # Initialize solution using nearest neighbor heuristic, tours are int64 arrays
         tour = self._construct_initial_tour(N, c, self.rand_gen)
-        current_routes = self._split_tour_into_routes(tour, Q, q)
-        current_cost = self._calculate_solution_cost(current_routes, c)
+        current_cost = self._tour_cost(tour, c, Q, q)
         
-        self.best_routes = current_routes.copy()
+        # Routes are only materialized from the tour when the best solution changes
+        best_tour = tour
+        self._set_best_tour(tour, Q, q)
         self.best_cost = current_cost
         
         if verbose:
             print(f"Initial solution cost: {self.best_cost:.2f}")
-            print(f"Initial number of routes: {len(self.best_routes)}")
+            print(f"Initial number of routes: {len(self.route_starts) - 1}")
         
-        # Iterated Local Search
+        # Iterated Local Search, the 2-opt stops after max_moves * len(tour) moves
+        max_moves = min(len(tour) * 2, 100)
         iteration = 0
         no_improvement = 0
         while iteration < iterations and (not self.start_time or time.time() - self.start_time < time_limit):
@@ -59,33 +134,28 @@ class localSearch_model(CVRPModel):
                 
             iteration += 1
             
-            # Perturb current solution
-            perturbed_tour = self._perturb_solution(tour, N, self.rand_gen)
-            perturbed_routes = self._split_tour_into_routes(perturbed_tour, Q, q)
-            
-            # Apply 2-opt local search
-            improved_tour = self._apply_2opt(perturbed_tour, c, Q, q, self.rand_gen)
-            improved_routes = self._split_tour_into_routes(improved_tour, Q, q)
-            improved_cost = self._calculate_solution_cost(improved_routes, c)
+            # Perturb the current solution and improve it with 2-opt in one kernel call
+            improved_tour, improved_cost = ils_iteration_numba(tour, c, Q, q, self.NN,
+                                                               max_moves, self.rand_gen)
+            improved_cost = float(improved_cost)
             
             # Update current solution
             if improved_cost < current_cost:
                 tour = improved_tour
-                current_routes = improved_routes
                 current_cost = improved_cost
                 no_improvement = 0
                 
                 # Update best solution if improved
                 if improved_cost < self.best_cost:
-                    self.best_routes = improved_routes.copy()
+                    best_tour = improved_tour
+                    self._set_best_tour(improved_tour, Q, q)
                     self.best_cost = improved_cost
                     if verbose:
-                        print(f"Iteration {iteration}: New best solution with cost {self.best_cost:.2f}, routes: {len(self.best_routes)}")
+                        print(f"Iteration {iteration}: New best solution with cost {self.best_cost:.2f}, routes: {len(self.route_starts) - 1}")
             else:
                 # Accept worse solution with small probability (for diversification)
                 if self.rand_gen.random() < 0.1:
                     tour = improved_tour
-                    current_routes = improved_routes
                     current_cost = improved_cost
                     if verbose:
                         print(f"Iteration {iteration}: Accepted worse solution for diversification")
@@ -97,194 +167,106 @@ class localSearch_model(CVRPModel):
                 if verbose:
                     print(f"Iteration {iteration}: Restarting search due to lack of improvement")
                 tour = self._construct_initial_tour(N, c, self.rand_gen)
-                current_routes = self._split_tour_into_routes(tour, Q, q)
-                current_cost = self._calculate_solution_cost(current_routes, c)
+                current_cost = self._tour_cost(tour, c, Q, q)
                 no_improvement = 0
                 
             if verbose and iteration % 10 == 0:
                 elapsed = time.time() - self.start_time if self.start_time else 0
                 print(f"Iteration {iteration}: Current best cost = {self.best_cost:.2f}, Elapsed time: {elapsed:.2f}s")
         
-        # Update solution and model status
-        self.solution = self._routes_to_arcs(self.best_routes)
-        self.objective_value = self.best_cost
-        self.solution_count = 1
-        self.status = 2  # Solution found
-        self.stop_timer()
-        self._solving = False
+        return best_tour, self.best_cost, iteration
+    
+    def _solve_parallel(self, time_limit, iterations, random_state, n_workers):
+        """
+        Run independent ILS workers in a process pool and keep the best result.
         
-        if verbose:
-            print(f"\nHeuristic solution completed:")
-            print(f"Final solution cost: {self.best_cost:.2f}")
-            print(f"Number of routes: {len(self.best_routes)}")
-            print(f"Solver running time: {self.runtime:.2f} seconds")
-            print(f"Number of iterations: {iteration}")
+        The static arrays are placed in shared memory once so workers attach to
+        them instead of receiving a pickled copy of the cost matrix each.
+        """
+        seeds = np.random.SeedSequence(random_state).generate_state(n_workers)
+        arrays = {'C': self.C, 'q': self.Q_arr, 'NN': self.NN}
+        blocks = []
+        try:
+            specs = {}
+            for key, arr in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                blocks.append(shm)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+                specs[key] = (shm.name, arr.shape, arr.dtype.str)
+            
+            # Spawn rather than fork, forking after Numba has started its threading layer can hang
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_context('spawn')) as executor:
+                futures = [executor.submit(_ils_worker, specs, list(self.instance['N']), self.instance['Q'],
+                                           int(seed), iterations, time_limit)
+                           for seed in seeds]
+                results = [future.result() for future in futures]
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
         
-        return self.solution
+        best_cost, best_tour, _ = min(results, key=lambda r: r[0])
+        return best_tour, best_cost, sum(r[2] for r in results)
         
     def _construct_initial_tour(self, nodes, costs, rand_gen):
         """
         Construct an initial tour using nearest neighbor heuristic
         with a random starting node for diversification
         """
-        remaining_nodes = nodes.copy()
+        remaining = np.zeros(len(costs), dtype=bool)
+        remaining[nodes] = True
         
         # Start from a random node
         if rand_gen.random() < 0.5:  # Sometimes start from depot
-            current = 0
-            tour = [0]
+            start = 0
         else:  # Sometimes start from random node
-            start_idx = rand_gen.randint(0, len(remaining_nodes))
-            current = remaining_nodes[start_idx]
-            remaining_nodes.remove(current)
-            tour = [0, current]  # Always start at depot in the solution
-        
-        # Build tour using nearest neighbor heuristic
-        while remaining_nodes:
-            best_node = None
-            best_cost = float('inf')
-            
-            for node in remaining_nodes:
-                cost = costs.get((current, node), float('inf'))
-                if cost < best_cost:
-                    best_cost = cost
-                    best_node = node
-                    
-            tour.append(best_node)
-            current = best_node
-            remaining_nodes.remove(best_node)
+            start = nodes[rand_gen.integers(0, len(nodes))]
         
-        return tour
+        # Build tour using nearest neighbor heuristic, always starting at depot
+        return nn_construct_numba(costs, remaining, start, self.NN)
 
-    def _split_tour_into_routes(self, tour, capacity, demands):
-        """Split a TSP tour into feasible CVRP routes respecting capacity constraints"""
-        routes = {}
-        route_idx = 1
-        current_route = [0]  # Start at depot
-        current_load = 0
-        
-        for node in tour:
-            if node == 0:  # Skip depot in tour
-                continue
-                
-            node_demand = demands.get(node, 0)
-            
-            # If adding this node exceeds capacity, close current route and start new one
-            if current_load + node_demand > capacity:
-                current_route.append(0)  # Return to depot
-                routes[route_idx] = current_route
-                route_idx += 1
-                
-                current_route = [0, node]  # Start new route
-                current_load = node_demand
-            else:
-                current_route.append(node)
-                current_load += node_demand
+    def _split_tour(self, tour, capacity, demands):
+        """
+        Split a TSP tour into feasible CVRP routes respecting capacity constraints.
         
-        # Close last route if not empty
-        if len(current_route) > 1:
-            current_route.append(0)  # Return to depot
-            routes[route_idx] = current_route
-            
-        return routes
+        Each route takes tour nodes until the next one would exceed the capacity.
+        The routes are returned back to back in one nodes array, consecutive
+        routes sharing the depot between them, with route_starts holding the
+        index of each route's leading depot and the index of the final one, so
+        route k is nodes[route_starts[k]:route_starts[k+1]+1].
+        """
+        return split_tour_numba(np.asarray(tour, dtype=np.int64), capacity, np.asarray(demands))
 
-    def _calculate_solution_cost(self, routes, costs):
-        """Calculate total cost of a solution"""
-        total_cost = 0
-        
-        for _, route in routes.items():
-            for i in range(len(route) - 1):
-                from_node, to_node = route[i], route[i + 1]
-                total_cost += costs.get((from_node, to_node), 0)
-        
-        return total_cost
+    def _routes_from_segments(self, nodes, route_starts):
+        """Rebuild the route dictionary {route_id: [0, ..., 0]} from the flat arrays"""
+        return {k + 1: nodes[route_starts[k]:route_starts[k + 1] + 1].tolist()
+                for k in range(len(route_starts) - 1)}
 
-    def _perturb_solution(self, tour, nodes, rand_gen):
-        """Perturb the solution using random moves"""
-        perturbed = tour.copy()
-        n = len(perturbed)
-        
-        # Choose perturbation type
-        perturbation_type = rand_gen.randint(0, 3)
-        
-        if perturbation_type == 0:
-            # Random swaps (excluding depot)
-            num_swaps = max(1, int(n * 0.2))  # Swap 20% of nodes
-            for _ in range(num_swaps):
-                i = rand_gen.randint(1, n)
-                j = rand_gen.randint(1, n)
-                if i < n and j < n:  # Ensure valid indices
-                    perturbed[i], perturbed[j] = perturbed[j], perturbed[i]
-                    
-        elif perturbation_type == 1:
-            # Random reversal of a segment
-            if n > 3:
-                i = rand_gen.randint(1, n-2)
-                j = rand_gen.randint(i+1, n-1)
-                perturbed[i:j+1] = reversed(perturbed[i:j+1])
-                
-        elif perturbation_type == 2:
-            # Random insertion (move a node to another position)
-            if n > 2:
-                i = rand_gen.randint(1, n-1)
-                j = rand_gen.randint(1, n-1)
-                if i != j:
-                    node = perturbed.pop(i)
-                    perturbed.insert(j, node)
-                    
-        else:
-            # Shuffle a segment
-            if n > 3:
-                i = rand_gen.randint(1, n-2)
-                j = rand_gen.randint(i+1, n-1)
-                segment = perturbed[i:j+1]
-                rand_gen.shuffle(segment)
-                perturbed[i:j+1] = segment
-                
-        return perturbed
+    def _tour_cost(self, tour, costs, capacity, demands):
+        """Cost of the routes a TSP tour splits into, without building them"""
+        return float(split_cost_numba(np.asarray(tour, dtype=np.int64), costs, capacity, demands))
+
+    def _segments_to_arcs(self, nodes):
+        """Convert the flat routes array to dictionary of active arcs {(i,j): 1}"""
+        return dict.fromkeys(zip(nodes[:-1].tolist(), nodes[1:].tolist()), 1)
 
-    def _apply_2opt(self, tour, costs, capacity, demands, rand_gen):
-        """Apply 2-opt local search to improve tour"""
-        improved = True
-        best_tour = tour.copy()
-        best_cost = self._calculate_solution_cost(self._split_tour_into_routes(best_tour, capacity, demands), costs)
-        max_iterations = min(len(tour) * 2, 100)  # Limit iterations for larger problems
-        
-        iteration = 0
-        while improved and iteration < max_iterations:
-            improved = False
-            iteration += 1
-            
-            # Try a sample of possible 2-opt moves for efficiency
-            # For large problems, checking all pairs would be too time-consuming
-            num_attempts = min(50, len(tour) * (len(tour) - 1) // 4)
-            
-            for _ in range(num_attempts):
-                # Randomly select two positions (excluding depot)
-                i = rand_gen.randint(1, len(tour) - 2)
-                j = rand_gen.randint(i + 1, len(tour) - 1)
-                
-                # Apply 2-opt: reverse subpath from i to j
-                new_tour = best_tour.copy()
-                new_tour[i:j+1] = reversed(best_tour[i:j+1])
-                
-                # Check if better
-                new_routes = self._split_tour_into_routes(new_tour, capacity, demands)
-                new_cost = self._calculate_solution_cost(new_routes, costs)
-                
-                if new_cost < best_cost:
-                    best_tour = new_tour
-                    best_cost = new_cost
-                    improved = True
-                    break
-        
-        return best_tour
 
-    def _routes_to_arcs(self, routes):
-        """Convert routes to dictionary of active arcs"""
-        active_arcs = {}  # Change to dictionary
-        for _, route in routes.items():
-            for i in range(len(route) - 1):
-                active_arcs[(route[i], route[i+1])] = 1  # Store as {(i,j): 1}
+def _ils_worker(specs, N, Q, seed, iterations, time_limit):
+    """Run one ILS in a worker process on arrays attached from shared memory"""
+    blocks = []
+    try:
+        arrays = {}
+        for key, (name, shape, dtype) in specs.items():
+            shm = shared_memory.SharedMemory(name=name)
+            blocks.append(shm)
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
         
-        return active_arcs
\ No newline at end of file
+        model = localSearch_model({'N': N, 'Q': Q})
+        model.C, model.Q_arr, model.NN = arrays['C'], arrays['q'], arrays['NN']
+        model.rand_gen = np.random.default_rng(seed)
+        model.start_timer()
+        best_tour, best_cost, iteration = model._iterated_local_search(time_limit, iterations)
+        return best_cost, np.array(best_tour), iteration
+    finally:
+        for shm in blocks:
+            shm.close()
@@ -1,49 +1,90 @@
-from src.models.ortools_emissions_model import ORToolsEmissionsModel
-from src.models.gurobi_model import GurobiModel
-from src.models.localSearch_model import localSearch_model
-from src.models.ortools_model import ORToolsModel
+import importlib
+from enum import IntEnum
 
-def create_model(model_type, instance=None):
+class Method(IntEnum):
+    """Solution methods, the values index the per-method tables"""
+    EXACT = 0
+    HEURISTIC = 1
+    ORTOOLS = 2
+    ORTOOLS_EMISSIONS = 3
+    
+    def __str__(self):
+        """Lower-case name used by the command line and the GUI"""
+        return self.name.lower()
+    
+    @classmethod
+    def parse(cls, method):
+        """Return method as a Method, accepting a Method or its lower-case name"""
+        if isinstance(method, cls):
+            return method
+        try:
+            return cls[str(method).upper()]
+        except KeyError:
+            raise ValueError(f"Unknown model type: {method}") from None
+
+# Per method: (module, class name, solver name, fallback method when the solver is not installed)
+# Modules are imported on first use so a missing optional solver only affects its own method
+_MODEL_REGISTRY = (
+    ('src.models.gurobi_model', 'GurobiModel', 'Gurobi', Method.HEURISTIC),
+    ('src.models.localSearch_model', 'localSearch_model', None, None),
+    ('src.models.ortools_model', 'ORToolsModel', 'OR-Tools', Method.HEURISTIC),
+    ('src.models.ortools_emissions_model', 'ORToolsEmissionsModel', None, None),
+)
+
+# Model classes indexed by Method, filled in by _model_class on first use
+_CTORS = [None] * len(Method)
+
+def _model_class(method):
+    """Import the model class of method once and keep it for later calls"""
+    if _CTORS[method] is None:
+        module_name, class_name = _MODEL_REGISTRY[method][:2]
+        _CTORS[method] = getattr(importlib.import_module(module_name), class_name)
+    return _CTORS[method]
+
+def preload_models():
+    """Import every installed model module up front, e.g. in a worker process before its first solve"""
+    for method in Method:
+        try:
+            _model_class(method)
+        except ImportError:
+            pass
+
+def create_model(model_type, instance=None, **model_kwargs):
     """
     Factory function to create the appropriate model instance.
     
     Parameters:
     ----------
-    model_type : str
-        Type of model to create ('exact', 'heuristic', 'ortools')
+    model_type : Method or str
+        Type of model to create ('exact', 'heuristic', 'ortools', 'ortools_emissions')
     instance : dict, optional
         The problem instance data
-        
+    **model_kwargs : dict
+        Extra constructor arguments for the requested model, such as
+        routing_parameters for the OR-Tools models. Dropped on fallback.
+    
     Returns:
     -------
     CVRPModel
         An instance of the requested model type
     """
+    method = Method.parse(model_type)
+    
     # Add method name to instance for traceability
     if instance is not None:
         instance = dict(instance)  # Create a copy to avoid modifying the original
-        instance['method_name'] = model_type.capitalize()
+        instance['method_name'] = str(method).capitalize()
     
-    if model_type.lower() == 'exact':
-        try:
-            return GurobiModel(instance)
-        except ImportError:
-            print("Gurobi not available. Falling back to heuristic method.")
-            if instance:
-                instance['method_name'] = 'Heuristic (fallback)'
-            return localSearch_model(instance)
-    
-    elif model_type.lower() == 'heuristic':
-        return localSearch_model(instance)
-    
-    elif model_type.lower() == 'ortools':
-        try:
-            return ORToolsModel(instance)
-        except ImportError:
-            print("OR-Tools not available. Falling back to heuristic method.")
-            return localSearch_model(instance)
-    elif model_type.lower() == 'ortools_emissions':
-        return ORToolsEmissionsModel(instance)
+    try:
+        model_class = _model_class(method)
+    except ImportError:
+        solver_name, fallback = _MODEL_REGISTRY[method][2:]
+        if fallback is None:
+            raise
+        print(f"{solver_name} not available. Falling back to {fallback} method.")
+        if instance:
+            instance['method_name'] = 'Heuristic (fallback)'
+        model_class = _model_class(fallback)
+        model_kwargs = {}
     
-    else:
-        raise ValueError(f"Unknown model type: {model_type}")
\ No newline at end of file
+    return model_class(instance, **model_kwargs)
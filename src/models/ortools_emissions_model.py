@@ -1,16 +1,19 @@
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 from src.models.ortools_model import ORToolsModel
+from src.models._kernels import NUMBA_AVAILABLE, emissions_matrix_numba
 
 class ORToolsEmissionsModel(ORToolsModel):
     """CVRP solver implementation using Google OR-Tools optimizing for CO2 emissions"""
     
-    def __init__(self, instance=None):
-        super().__init__(instance=instance)
+    def __init__(self, instance=None, routing_parameters=None):
+        super().__init__(instance=instance, routing_parameters=routing_parameters)
         self.name = 'fashion_reverse_logistics_ortools_emissions'
         # Default emission parameters if not provided in instance
         self.alpha = instance.get('alpha', 0.15)  # Base CO2 per km (kg/km)
         self.beta = instance.get('beta', 0.02)    # Load-dependent factor (kg/km/kg)
+        self._emis_mat = None  # Scaled integer emissions indexed [from_node, to_node]
     
     def build_model(self):
         """Build the OR-Tools routing model with emissions-aware objective"""
@@ -20,28 +23,19 @@ class ORToolsEmissionsModel(ORToolsModel):
         # Extract instance data
         N = list(self.instance['N'])
         V = list(self.instance['V'])
-        q = self.instance['q']  # Demands
         
         # Create the routing index manager
         self.manager = pywrapcp.RoutingIndexManager(len(V), len(N), 0)
         
         # Create Routing Model
-        self.routing = pywrapcp.RoutingModel(self.manager)
+        self.routing = pywrapcp.RoutingModel(self.manager, self._routing_model_parameters())
+        self._add_stop_limit()
         
-        # Register distance callback
-        def distance_callback(from_index, to_index):
-            from_node = self.manager.IndexToNode(from_index)
-            to_node = self.manager.IndexToNode(to_index)
-            return int(self.instance['c'].get((from_node, to_node), 0) * 100)  # Scale distances
-        
-        transit_callback_index = self.routing.RegisterTransitCallback(distance_callback)
+        # Register distances as a precomputed matrix evaluated natively by OR-Tools
+        transit_callback_index = self.routing.RegisterTransitMatrix(self._scaled_distance_matrix().tolist())
         
         # Add capacity dimension for load tracking
-        def demand_callback(from_index):
-            from_node = self.manager.IndexToNode(from_index)
-            return self.instance['q'].get(from_node, 0)
-        
-        demand_callback_index = self.routing.RegisterUnaryTransitCallback(demand_callback)
+        demand_callback_index = self.routing.RegisterUnaryTransitVector(self._demand_vector())
         capacity_dimension_name = 'Capacity'
         
         self.routing.AddDimensionWithVehicleCapacity(
@@ -51,40 +45,11 @@ class ORToolsEmissionsModel(ORToolsModel):
             True,  # start cumul to zero
             capacity_dimension_name)
             
-        # Create emissions callback that depends on distance and load
-        def emissions_callback(from_index, to_index):
-            from_node = self.manager.IndexToNode(from_index)
-            to_node = self.manager.IndexToNode(to_index)
-            
-            # Get the distance between nodes
-            distance = self.instance['c'].get((from_node, to_node), 0)
-            
-            # Calculate emissions based on distance and load
-            # For emissions, we need the load at departure
-            # This is calculated based on the remaining pickups after visiting from_node
-            # Note: In OR-Tools, this callback is called before the dimension is fully set up,
-            # so we estimate the load here based on a simple calculation
-            
-            # Base emissions (distance * alpha)
-            base_emissions = distance * self.alpha
-            
-            # Estimate the vehicle load between nodes
-            # For a reverse logistics problem, load increases as the vehicle progresses
-            # Start with 0 at depot, add demand at each node
-            load = 0
-            if from_node != 0:  # If not starting at depot
-                load = q.get(from_node, 0)  # Load collected at current node
-            
-            # Load-dependent emissions
-            load_emissions = distance * self.beta * load
-            
-            # Total emissions
-            total_emissions = (base_emissions + load_emissions) * 100  # Scale for integer math
-            
-            return int(total_emissions)
+        # Emissions depend on distance and load, precomputed for every arc
+        self._emis_mat = self._scaled_emissions_matrix()
         
-        # Register emissions callback
-        emissions_callback_index = self.routing.RegisterTransitCallback(emissions_callback)
+        # Register emissions matrix
+        emissions_callback_index = self.routing.RegisterTransitMatrix(self._emis_mat.tolist())
         
         # Set the cost function to emissions instead of just distance
         self.routing.SetArcCostEvaluatorOfAllVehicles(emissions_callback_index)
@@ -100,6 +65,30 @@ class ORToolsEmissionsModel(ORToolsModel):
         
         return self.routing
     
+    def _scaled_emissions_matrix(self):
+        """
+        Arc emissions scaled by 100 and truncated to integers.
+        
+        The load on an arc is estimated as the demand collected at its origin
+        (nothing when leaving the depot), since OR-Tools evaluates arc costs
+        before the capacity dimension is known. Emissions are then
+        distance * (alpha + beta * load).
+        """
+        load = np.asarray(self.instance['q'], dtype=np.float64).copy()
+        load[0] = 0  # Starting at the depot
+        
+        c = self.instance['c']
+        if NUMBA_AVAILABLE:
+            # One compiled pass writing the integer matrix, no float64 intermediate
+            return emissions_matrix_numba(np.ascontiguousarray(c), load, self.alpha, self.beta)
+        
+        # Emission factor per origin node, scaled for integer math, applied to
+        # every outgoing arc in one pass over the distance matrix
+        factor = (self.alpha + self.beta * load) * 100
+        emissions = np.empty(np.shape(c), dtype=np.int64)
+        np.multiply(c, factor[:, None], out=emissions, dtype=np.float64, casting='unsafe')
+        return emissions
+    
     def solve(self, time_limit=60, verbose=False):
         """Solve using OR-Tools with emissions-aware objective"""
         if not self.routing:
@@ -120,7 +109,7 @@ class ORToolsEmissionsModel(ORToolsModel):
         if verbose:
             print("Solving with OR-Tools CP (Emissions-aware)...")
         
-        self._stop_requested = False
+        self._stop_event.clear()
         self._solving = True
         self.start_timer()
         
@@ -162,6 +151,7 @@ class ORToolsEmissionsModel(ORToolsModel):
             # Update solution
             for arc in active_arcs:
                 self.solution[arc] = 1
+            self._solution_dirty = True
                 
             # Add emissions info to instance for solution reporting
             self.instance['method_name'] = 'OR-Tools CP (Emissions-aware)'
@@ -169,9 +159,6 @@ class ORToolsEmissionsModel(ORToolsModel):
             self.instance['beta'] = self.beta
             self.instance['emissions_optimized'] = True
             
-            if verbose:
-                self.print_solution_summary()
-                
         else:
             if verbose:
                 print("No solution found!")
@@ -183,37 +170,15 @@ class ORToolsEmissionsModel(ORToolsModel):
         """Print a summary of the solution with emissions information"""
         super().print_solution_summary()
         
-        solution_obj = self.get_solution_object()
-        routes = solution_obj.routes
+        # Cached on the solution object, repeated summaries reuse the same figures
+        emissions = self.get_solution_object().calculate_emissions(self.alpha, self.beta)
         
         print("\nEmissions Parameters:")
         print(f"  Base CO2 per km (α): {self.alpha} kg/km")
         print(f"  Load-dependent factor (β): {self.beta} kg/km/kg")
         
-        # Calculate total emissions
-        total_emissions = 0
         print("\nEmissions by Route:")
-        
-        for route_id, route in routes.items():
-            route_emissions = 0
-            load = 0
-            
-            for i in range(len(route)-1):
-                from_node = route[i]
-                to_node = route[i+1]
-                
-                # Distance between nodes
-                distance = self.instance['c'][(from_node, to_node)]
-                
-                # If not at depot, add the load from the node
-                if from_node != 0:
-                    load += self.instance['q'].get(from_node, 0)
-                
-                # Calculate emissions for this segment
-                segment_emissions = distance * (self.alpha + self.beta * load)
-                route_emissions += segment_emissions
-            
+        for route_id, route_emissions in emissions['route_emissions'].items():
             print(f"  Route {route_id}: {route_emissions:.2f} kg CO2")
-            total_emissions += route_emissions
         
-        print(f"\nTotal CO2 Emissions: {total_emissions:.2f} kg")
\ No newline at end of file
+        print(f"\nTotal CO2 Emissions: {emissions['total_emissions']:.2f} kg")
\ No newline at end of file
@@ -1,15 +1,20 @@
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
+from src.data.data_handling import scaled_distance_matrix
 from src.models.base_model import CVRPModel
 
 class ORToolsModel(CVRPModel):
     """CVRP solver implementation using Google OR-Tools"""
     
-    def __init__(self, instance=None):
+    def __init__(self, instance=None, routing_parameters=None):
         super().__init__(name='fashion_reverse_logistics_ortools', instance=instance)
         self.manager = None
         self.routing = None
         self.solution = {}
+        self.routing_parameters = routing_parameters  # RoutingModelParameters, defaults built in build_model
+        self._dist_mat = None  # Scaled integer distances indexed [from_node, to_node]
+        self._stop_callback = None  # Solution callback that ends the search once a stop is requested
     
     def build_model(self):
         """Build the OR-Tools routing model"""
@@ -24,25 +29,17 @@ class ORToolsModel(CVRPModel):
         self.manager = pywrapcp.RoutingIndexManager(len(V), len(N), 0)
         
         # Create Routing Model
-        self.routing = pywrapcp.RoutingModel(self.manager)
+        self.routing = pywrapcp.RoutingModel(self.manager, self._routing_model_parameters())
+        self._add_stop_limit()
         
-        # Register distance callback
-        def distance_callback(from_index, to_index):
-            from_node = self.manager.IndexToNode(from_index)
-            to_node = self.manager.IndexToNode(to_index)
-            return int(self.instance['c'].get((from_node, to_node), 0) * 100)  # Scale distances
-        
-        transit_callback_index = self.routing.RegisterTransitCallback(distance_callback)
+        # Register distances as a precomputed matrix evaluated natively by OR-Tools
+        transit_callback_index = self.routing.RegisterTransitMatrix(self._scaled_distance_matrix().tolist())
         
         # Define cost of each arc
         self.routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
         
         # Add Capacity constraint
-        def demand_callback(from_index):
-            from_node = self.manager.IndexToNode(from_index)
-            return self.instance['q'].get(from_node, 0)
-        
-        demand_callback_index = self.routing.RegisterUnaryTransitCallback(demand_callback)
+        demand_callback_index = self.routing.RegisterUnaryTransitVector(self._demand_vector())
         self.routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
             0,  # null capacity slack
@@ -52,6 +49,42 @@ class ORToolsModel(CVRPModel):
             
         return self.routing
     
+    def _add_stop_limit(self):
+        """Check should_stop at each new solution, so request_stop ends the search early
+        
+        Polling a Python limit at every search node slows the whole search down, while a
+        check per solution only runs when the local search improves.
+        """
+        solver = self.routing.solver()
+        
+        def finish_if_stopped():
+            if self.should_stop():
+                solver.FinishCurrentSearch()
+        
+        # Kept on the model so the callback lives as long as the routing model
+        self._stop_callback = finish_if_stopped
+        self.routing.AddAtSolutionCallback(self._stop_callback)
+    
+    def _routing_model_parameters(self):
+        """Routing parameters passed to the model, or defaults that cache every arc cost"""
+        if self.routing_parameters is not None:
+            return self.routing_parameters
+        routing_parameters = pywrapcp.DefaultRoutingModelParameters()
+        routing_parameters.max_callback_cache_size = len(self.instance['V']) ** 2
+        # Every vehicle shares the same capacity and arc cost evaluator
+        routing_parameters.reduce_vehicle_cost_model = True
+        return routing_parameters
+    
+    def _scaled_distance_matrix(self):
+        """Integer arc costs OR-Tools needs, distances scaled by 100 and truncated on first use"""
+        if self._dist_mat is None:
+            self._dist_mat = scaled_distance_matrix(self.instance['c'])
+        return self._dist_mat
+    
+    def _demand_vector(self):
+        """Demand per node as a list of Python ints"""
+        return np.asarray(self.instance['q'], dtype=np.int64).tolist()
+    
     def solve(self, time_limit=60, verbose=False):
         """Solve using OR-Tools"""
         if not self.routing:
@@ -68,14 +101,11 @@ class ORToolsModel(CVRPModel):
         search_parameters.time_limit.seconds = time_limit
         search_parameters.log_search = verbose
         
-        # OR-Tools doesn't have a direct way to stop the solver during execution
-        # We'll have to rely on the time limit or completion
-        
         # Solve the problem
         if verbose:
             print("Solving with OR-Tools CP...")
         
-        self._stop_requested = False
+        self._stop_event.clear()
         self._solving = True
         self.start_timer()
         
@@ -117,9 +147,7 @@ class ORToolsModel(CVRPModel):
             # Update solution
             for arc in active_arcs:
                 self.solution[arc] = 1
-                
-            if verbose:
-                self.print_solution_summary()
+            self._solution_dirty = True
                 
         else:
             if verbose:
@@ -1,33 +1,65 @@
-from src.models.model_factory import create_model
+import time
+from src.models.model_factory import Method, create_model
+from src.utils.instance import SolveContext
 from src.utils.solution import Solution
 
-def solve_cvrp(instance, method='exact', time_limit=60, **kwargs):
+# Name reported for each method, indexed by Method
+_METHOD_NAMES = ('Exact (Gurobi)', 'Heuristic (ILS)', 'OR-Tools CP', 'OR-Tools CP (Emissions)')
+
+# Keyword arguments each method's solve() accepts besides time_limit and verbose, indexed by Method
+_ALLOWED_KWARGS = (
+    frozenset({'warm_start', 'mip_gap', 'node_limit'}),
+    frozenset({'iterations', 'random_state', 'n_workers'}),
+    frozenset(),
+    frozenset(),
+)
+
+_ORTOOLS_METHODS = (Method.ORTOOLS, Method.ORTOOLS_EMISSIONS)
+
+# Search guidance never given to the emissions model. Hints, warm starts and branching
+# priorities derived from the distance objective hold back the solver's own learning
+_EMISSIONS_STRIPPED_KWARGS = ('hint', 'initial_solution', 'branching_priority', 'warm_start')
+assert not _ALLOWED_KWARGS[Method.ORTOOLS_EMISSIONS] & set(_EMISSIONS_STRIPPED_KWARGS)
+
+def solve_cvrp(instance, method=Method.EXACT, time_limit=60, **kwargs):
     """
     Solve a CVRP instance using the specified method.
     
     Parameters:
     ----------
     instance : dict
-        Problem instance data
-    method : str
+        Problem instance data, not modified
+    method : Method or str
         Solving method ('exact', 'heuristic', 'ortools', 'ortools_emissions')
     time_limit : int
         Maximum solution time in seconds
     **kwargs : dict
         Additional parameters for specific solvers:
         - iterations: for heuristic methods
+        - mip_gap, node_limit: Gurobi MIPGap and NodeLimit for the exact method
         - alpha: base CO2 per km (kg/km) for emissions calculations
         - beta: load-dependent emission factor (kg/km/kg) for emissions calculations
+        - routing_parameters: pywrapcp.RoutingModelParameters for the OR-Tools
+          methods, replacing the defaults that cache every arc cost
         
     Returns:
     -------
     Solution
         Solution object containing arcs and methods for analysis and visualization
     """
-    verbose = kwargs.get('verbose', True)
+    method = Method.parse(method)
+    verbose = kwargs.pop('verbose', True)
+    
+    # The caller's instance is left untouched, per-solve values are layered over it
+    context = SolveContext(
+        method_name=_METHOD_NAMES[method],
+        emissions_optimized=method == Method.ORTOOLS_EMISSIONS,
+        alpha=kwargs.pop('alpha', None),
+        beta=kwargs.pop('beta', None))
+    instance = context.view(instance)
     
     if verbose:
-        if method == 'ortools_emissions':
+        if method == Method.ORTOOLS_EMISSIONS:
             alpha = instance.get('alpha', 0.15)
             beta = instance.get('beta', 0.02)
             print(f"Solving CVRP with {method} method, time limit: {time_limit}s")
@@ -35,26 +67,34 @@ def solve_cvrp(instance, method='exact', time_limit=60, **kwargs):
         else:
             print(f"Solving CVRP with {method} method, time limit: {time_limit}s")
     
-    # Store method name in instance for solution reporting
-    instance['method_name'] = {
-        'exact': 'Exact (Gurobi)',
-        'heuristic': 'Heuristic (ILS)',
-        'ortools': 'OR-Tools CP',
-        'ortools_emissions': 'OR-Tools CP (Emissions)'
-    }.get(method, method)
+    # Create model using factory, routing parameters only apply to the OR-Tools models
+    model_kwargs = {}
+    routing_parameters = kwargs.pop('routing_parameters', None)
+    if routing_parameters is not None and method in _ORTOOLS_METHODS:
+        model_kwargs['routing_parameters'] = routing_parameters
+    model = create_model(method, instance, **model_kwargs)
     
-    # Create model using factory
-    model = create_model(method, instance)
+    if method == Method.ORTOOLS_EMISSIONS:
+        for key in _EMISSIONS_STRIPPED_KWARGS:
+            kwargs.pop(key, None)
     
-    # Solve the model
-    model.solve(time_limit=time_limit, verbose=verbose, **kwargs)
+    # Pass each backend only the arguments its solve() accepts, the fallback model is the heuristic
+    solve_method = Method.HEURISTIC if model.instance.get('method_name') == 'Heuristic (fallback)' else method
+    allowed = _ALLOWED_KWARGS[solve_method]
+    solve_kwargs = {key: value for key, value in kwargs.items() if key in allowed}
     
-    # Flag for solution object to know if this was emissions-optimized
-    if method == 'ortools_emissions':
-        instance['emissions_optimized'] = True
+    # Solve the model
+    model.solve(time_limit=time_limit, verbose=verbose, **solve_kwargs)
     
+    # Report the model summary once, the models print none from solve()
     if verbose:
         model.print_solution_summary()
     
     # Return solution object instead of just the arcs
-    return Solution(instance, model.solution)
\ No newline at end of file
+    return Solution(instance, model.solution)
+
+def _solve_in_process(instance, method, time_limit, kwargs):
+    """Solve one comparison method in a worker process, returning the Solution and its runtime"""
+    start_time = time.time()
+    solution = solve_cvrp(instance, method, time_limit, verbose=False, **kwargs)
+    return solution, time.time() - start_time
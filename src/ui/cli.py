@@ -1,5 +1,4 @@
 import time
-from gurobipy import GRB
 
 # Import modules from our project
 from src.data.data_handling import load_problem_instance, create_random_problem_instance
@@ -15,27 +14,23 @@ def run_cli(args):
         instance = create_random_problem_instance(args.shops, args.capacity, args.seed)
         print(f"Created random problem instance with {args.shops} shops")
     
-    # Add emissions parameters to instance if provided
-    if hasattr(args, 'alpha'):
-        instance['alpha'] = args.alpha
-    if hasattr(args, 'beta'):
-        instance['beta'] = args.beta
-        
-    # Solve the instance
+    # Solve the instance, emissions parameters are passed if provided
+    emission_params = {key: getattr(args, key) for key in ('alpha', 'beta') if hasattr(args, key)}
     solution = solve_cvrp(
         instance, 
         method=args.method,
         time_limit=args.time_limit,
         iterations=args.iterations,
         random_state=args.seed,
-        verbose=True
+        verbose=True,
+        **emission_params
     )
     
-    # Print solution summary
-    solution.print_summary()
+    # Print solution summary, with the emissions estimate for the given parameters
+    solution.print_summary(include_emissions=True)
     
     # Save solution files
-    solution.save_solution_files()
+    solution.save_solution_files(include_emissions=True)
     
     # Visualize solution
     solution.visualize("reverse_logistics_solution.png")
\ No newline at end of file
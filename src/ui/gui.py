@@ -1,24 +1,56 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+except ImportError as e:
+    raise ImportError("The graphical interface requires tkinter, which ships with Python. "
+                      "On Linux install the system package (e.g. 'sudo apt install python3-tk').") from e
+import hashlib
+import os
 import sys
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
 
 # Import modules from our project
 from src.data.data_handling import load_problem_instance, create_random_problem_instance, create_sample_instances
-from src.models.model_factory import create_model
+from src.models.model_factory import Method, create_model, preload_models
+from src.models.solver import _solve_in_process
+
+# Methods solved side by side by "Run All Methods", in worker processes running
+# solver._solve_in_process so that they never import tkinter
+_COMPARISON_METHODS = (Method.EXACT, Method.HEURISTIC, Method.ORTOOLS)
 
 class TextRedirector:
     """Redirects print output to a tkinter text widget"""
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, interval_ms=50, max_lines=5000):
         self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.max_lines = max_lines
+        # Writes may come from the solver thread and only append to the buffer,
+        # pump is the only code touching the widget and runs on the Tk thread
+        self._buf = deque()
+        self.text_widget.after(self.interval_ms, self.pump)
         
     def write(self, string):
-        self.text_widget.insert("end", string)
-        self.text_widget.see("end")
-        self.text_widget.update_idletasks()
+        self._buf.append(string)
         
     def flush(self):
         pass
+    
+    def pump(self):
+        """Insert everything written since the last pump in one widget update, then reschedule"""
+        # Drain only what is buffered now, so a solver writing faster than Tk can insert never stalls the pump
+        chunks = [self._buf.popleft() for _ in range(len(self._buf))]
+        if chunks:
+            self.text_widget.insert("end", "".join(chunks))
+            # Keep the log bounded so inserts and scrolling stay cheap on long runs
+            excess = int(self.text_widget.index("end-1c").split(".")[0]) - self.max_lines
+            if excess > 0:
+                self.text_widget.delete("1.0", f"{excess + 1}.0")
+            self.text_widget.see("end")
+        self.text_widget.after(self.interval_ms, self.pump)
 
 
 class InputFrame:
@@ -310,12 +342,25 @@ class SolverGUI:
         self.root.title("Fashion Reverse Logistics Solver")
         self.root.geometry("700x550")
         
-        # Model reference for stopping
+        # Model reference for stopping, and the future resolved with its Solution
         self.current_model = None
+        self._solve_future = None
+        self._solve_start = None
+        
+        # Worker processes for "Run All Methods", started on first use
+        self._pool = None
+        self._comparison = {}  # Pending future -> method
+        self._comparison_start = None
         
         # Create the input frame
         self.input_frame = InputFrame(root)
         
+        # Built models keyed by a digest of the method and instance, dropped when the input changes
+        self._model_cache = {}
+        for var in (self.input_frame.input_var, self.input_frame.random_instance_var,
+                    self.input_frame.shops_var, self.input_frame.capacity_var, self.input_frame.seed_var):
+            var.trace_add('write', lambda *args: self._model_cache.clear())
+        
         # Create the solver frame
         self.solver_frame = SolverFrame(root)
         
@@ -352,6 +397,14 @@ class SolverGUI:
         )
         self.stop_button.pack(side="right", padx=5)
         
+        # Run all methods button
+        self.run_all_button = ttk.Button(
+            button_frame, 
+            text="Run All Methods", 
+            command=self._run_all
+        )
+        self.run_all_button.pack(side="right", padx=5)
+        
         # Run button
         self.run_button = ttk.Button(
             button_frame, 
@@ -366,7 +419,7 @@ class SolverGUI:
     
     def _stop_solver(self):
         """Stop the current solver if running"""
-        if self.current_model and self.current_model.is_solving():
+        if self._solve_future is not None and not self._solve_future.done():
             print("Stopping optimization...")
             self.current_model.request_stop()
             self.stop_button.config(state="disabled")
@@ -386,17 +439,7 @@ class SolverGUI:
             params = self.solver_frame.get_parameters()
             
             # Load or generate instance
-            if instance_data['type'] == 'random':
-                print(f"Generating random instance with {instance_data['n_shops']} shops...")
-                instance = create_random_problem_instance(
-                    instance_data['n_shops'], 
-                    instance_data['capacity'], 
-                    instance_data['seed']
-                )
-            else:
-                file_path = instance_data['file_path']
-                print(f"Loading instance from {file_path}...")
-                instance = load_problem_instance(file_path)
+            instance = self._load_instance(instance_data)
             
             # Create and solve the model asynchronously
             self._solve_model_async(instance, params)
@@ -406,9 +449,93 @@ class SolverGUI:
             messagebox.showerror("Error", str(e))
             self.status_frame.restore_stdout(original_stdout)
     
+    def _load_instance(self, instance_data):
+        """Load the instance file or generate the random instance selected in the input frame"""
+        if instance_data['type'] == 'random':
+            print(f"Generating random instance with {instance_data['n_shops']} shops...")
+            return create_random_problem_instance(
+                instance_data['n_shops'], 
+                instance_data['capacity'], 
+                instance_data['seed']
+            )
+        
+        file_path = instance_data['file_path']
+        print(f"Loading instance from {file_path}...")
+        return load_problem_instance(file_path)
+    
+    def _run_all(self):
+        """Solve the instance with every comparison method at once in worker processes"""
+        self.status_frame.clear()
+        original_stdout = self.status_frame.redirect_stdout()
+        
+        try:
+            instance = self._load_instance(self.input_frame.get_instance_data())
+            params = self.solver_frame.get_parameters()
+            iterations = int(self.solver_frame.iterations_var.get())
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            messagebox.showerror("Error", str(e))
+            self.status_frame.restore_stdout(original_stdout)
+            return
+        
+        if self._pool is None:
+            # Leave cores for the solvers' own threads, spawn since Tk and Numba threads do not survive fork
+            workers = max(1, min(len(_COMPARISON_METHODS), (os.cpu_count() or 1) // 4))
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                             initializer=preload_models)
+        
+        emission_params = {'alpha': params['alpha'], 'beta': params['beta']}
+        for method in _COMPARISON_METHODS:
+            kwargs = dict(emission_params)
+            if method == Method.HEURISTIC:
+                kwargs.update(iterations=iterations, random_state=42)
+            future = self._pool.submit(_solve_in_process, instance, method, params['time_limit'], kwargs)
+            self._comparison[future] = method
+        
+        print(f"Solving with {', '.join(map(str, _COMPARISON_METHODS))} in parallel...")
+        self.run_button.config(state="disabled")
+        self.run_all_button.config(state="disabled")
+        self._comparison_start = time.time()
+        self.root.after(100, self._poll_comparison)
+    
+    def _poll_comparison(self):
+        """Report each comparison run as it finishes, then re-enable the buttons"""
+        for future in [future for future in self._comparison if future.done()]:
+            method = self._comparison.pop(future)
+            try:
+                solution, runtime = future.result()
+            except Exception as e:
+                print(f"\n{method} failed: {str(e)}")
+                continue
+            print(f"\n{method} finished in {runtime:.2f} seconds")
+            print(solution.format_summary(include_emissions=True))
+        
+        if self._comparison:
+            self.root.after(100, self._poll_comparison)
+            return
+        
+        print(f"\nAll methods completed in {time.time() - self._comparison_start:.2f} seconds")
+        self._update_run_buttons()
+    
+    def _update_run_buttons(self):
+        """Enable the run buttons once neither a single solve nor a comparison is running"""
+        solving = self._solve_future is not None and not self._solve_future.done()
+        state = "disabled" if solving or self._comparison else "normal"
+        self.run_button.config(state=state)
+        self.run_all_button.config(state=state)
+    
+    def close(self):
+        """Shut down the comparison worker processes, dropping the runs not started yet"""
+        if self._pool is not None:
+            # Cancelled one by one, shutdown(cancel_futures=True) needs Python 3.9
+            for future in self._comparison:
+                future.cancel()
+            self._pool.shutdown(wait=False)
+            self._pool = None
+    
     def _solve_model_async(self, instance, params):
         """Create and solve the model in a background thread"""
-        method = params['method']
+        method = Method.parse(params['method'])
         time_limit = params['time_limit']
         
         # Add emissions parameters to instance if provided
@@ -417,60 +544,84 @@ class SolverGUI:
         if 'beta' in params:
             instance['beta'] = params['beta']
         
-        # Create and configure model
-        print(f"Creating {method} model...")
-        self.current_model = create_model(method, instance)
+        # Reuse the model built for the same method and instance, only its search state is reset
+        key = self._model_cache_key(method, instance)
+        model = self._model_cache.get(key)
+        if model is None:
+            print(f"Creating {method} model...")
+            model = create_model(method, instance)
+            self._model_cache[key] = model
+        else:
+            print(f"Reusing {method} model built for this instance...")
+            model.reset_search()
+        self.current_model = model
         
         # Add additional parameters
         solver_params = {'time_limit': time_limit, 'verbose': True}
-        if method == 'heuristic':
+        if method == Method.HEURISTIC:
             solver_params['iterations'] = params.get('iterations', 100)
             solver_params['random_state'] = 42
         
-        # Disable run button and enable stop button
+        # Disable the run buttons and enable stop button
         self.run_button.config(state="disabled")
+        self.run_all_button.config(state="disabled")
         self.stop_button.config(state="normal")
         
         # Start solving in background thread
-        if method == 'ortools_emissions':
+        if method == Method.ORTOOLS_EMISSIONS:
             print(f"\nSolving using {method} approach with emissions parameters:")
             print(f"  α = {instance.get('alpha', 0.15)} kg/km, β = {instance.get('beta', 0.02)} kg/km/kg")
         else:
             print(f"\nSolving using {method} approach...")
         
-        start_time = time.time()
+        # The solver thread only resolves the future, the Tk thread picks the result up in _poll_done
+        self._solve_future = Future()
+        self._solve_start = time.time()
+        self.current_model.solve_async(callback=self._solve_future.set_result,
+                                       error_callback=self._solve_future.set_exception, **solver_params)
+        self.root.after(50, self._poll_done)
+    
+    def _poll_done(self):
+        """Process the solution on the Tk thread once the solve has finished"""
+        if not self._solve_future.done():
+            self.root.after(50, self._poll_done)
+            return
         
-        def on_solve_complete(solution_obj):
-            elapsed_time = time.time() - start_time
+        try:
+            solution_obj = self._solve_future.result()
+        except Exception as e:
+            print(f"\nError: {str(e)}")
+            messagebox.showerror("Error", str(e))
+        else:
+            elapsed_time = time.time() - self._solve_start
             print(f"\nSolution completed in {elapsed_time:.2f} seconds")
-            
-            # Process solution
             self._process_solution(solution_obj)
-            
-            # Re-enable run button and disable stop button
-            self.root.after(0, lambda: self.run_button.config(state="normal"))
-            self.root.after(0, lambda: self.stop_button.config(state="disabled"))
         
-        # Start solving asynchronously
-        self.current_model.solve_async(callback=on_solve_complete, **solver_params)
+        # Re-enable the run buttons and disable stop button
+        self._update_run_buttons()
+        self.stop_button.config(state="disabled")
+    
+    def _model_cache_key(self, method, instance):
+        """Digest of the method and the instance data a built model depends on"""
+        digest = hashlib.blake2b(str(method).encode())
+        digest.update(np.ascontiguousarray(instance['c']).tobytes())
+        digest.update(np.ascontiguousarray(instance['q']).tobytes())
+        digest.update(repr((instance['Q'], instance.get('alpha'), instance.get('beta'))).encode())
+        return digest.digest()
     
     def _process_solution(self, solution_obj):
         """Process and display the solution"""
         if self.current_model.is_solved():
-            # Display solution information
-            self.current_model.print_solution_summary()
-            
-            # Print solution details
-            solution_obj.print_summary()
-            
-            # Calculate and display emissions if not already done
-            emissions_info = solution_obj.calculate_emissions()
-            if not solution_obj.instance.get('emissions_optimized', False):
-                print(f"\nEstimated CO2 Emissions: {emissions_info['total_emissions']:.2f} kg")
-                print(f"Using parameters: α={emissions_info['alpha']} kg/km, β={emissions_info['beta']} kg/km/kg")
+            # Write the solution report, emissions estimate included, in a single pass
+            summary = solution_obj.format_summary(include_emissions=True)
+            instance = solution_obj.instance
+            if not instance.get('emissions_optimized', False):
+                summary += (f"\nUsing emissions parameters: α={instance.get('alpha', 0.15)} kg/km, "
+                            f"β={instance.get('beta', 0.02)} kg/km/kg")
+            print(summary)
             
             # Save solution files
-            solution_obj.save_solution_files()
+            solution_obj.save_solution_files(include_emissions=True)
             
             # Generate visualization
             output_file = "reverse_logistics_solution.png"
@@ -485,4 +636,5 @@ def run_gui():
     """Run the GUI interface"""
     root = tk.Tk()
     app = SolverGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.close()
\ No newline at end of file
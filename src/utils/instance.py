@@ -0,0 +1,25 @@
+from collections import ChainMap
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class SolveContext:
+    """
+    Per-solve annotations reported alongside a problem instance.
+
+    Instances are shared dicts of NumPy arrays and are not modified by a solve;
+    the method name, emissions flag and emission parameters of a run live here
+    and are layered over the instance with view().
+    """
+    method_name: str
+    emissions_optimized: bool = False
+    alpha: float = None
+    beta: float = None
+
+    def view(self, instance):
+        """Read-through mapping of instance with the fields of this context taking precedence"""
+        overrides = {'method_name': self.method_name, 'emissions_optimized': self.emissions_optimized}
+        if self.alpha is not None:
+            overrides['alpha'] = self.alpha
+        if self.beta is not None:
+            overrides['beta'] = self.beta
+        return ChainMap(overrides, instance)
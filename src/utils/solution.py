@@ -1,5 +1,21 @@
+import csv
 from datetime import datetime
 import os
+import numpy as np
+
+# Matplotlib classes used by Solution.visualize, imported by _plotting on first use
+_PLOTTING = None
+
+def _plotting():
+    """Import the matplotlib pieces used for plotting once, returning (cm, FigureCanvasAgg, Figure, LineCollection)"""
+    global _PLOTTING
+    if _PLOTTING is None:
+        from matplotlib import cm
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+        _PLOTTING = (cm, FigureCanvasAgg, Figure, LineCollection)
+    return _PLOTTING
 
 class Solution:
     """
@@ -9,6 +25,9 @@ class Solution:
     for analyzing routes, calculating metrics, and visualizing solutions.
     """
     
+    # Solutions are created for every solve and solution callback, slots keep them small
+    __slots__ = ('instance', '_arcs', '_active_arcs', '_routes', '_metrics', '_emissions_cache', '_c_arr', '_q_arr')
+    
     def __init__(self, instance, arcs=None):
         """
         Initialize a solution object.
@@ -21,18 +40,59 @@ class Solution:
             Dictionary of active arcs {(i,j): 1 if arc used, 0 otherwise}
         """
         self.instance = instance
-        self.arcs = arcs or {}
+        self.arcs = arcs or {}  # Also resets the caches derived from the arcs
+        self._c_arr = None  # Distance matrix as a 2-D array
+        self._q_arr = None  # Demand per node as a 1-D array
+    
+    @property
+    def arcs(self):
+        """Dictionary of arcs {(i,j): value}, assign a new dictionary to change the solution"""
+        return self._arcs
+    
+    @arcs.setter
+    def arcs(self, arcs):
+        self._arcs = arcs
+        # Everything below is derived from the arcs on first access only
+        self._active_arcs = None  # Cache for active arcs
         self._routes = None  # Cache for routes
         self._metrics = None  # Cache for solution metrics
+        self._emissions_cache = {}  # Cache for emissions by (alpha, beta)
     
     @property
     def active_arcs(self):
-        """Get list of active arcs in the solution"""
-        return [(i, j) for (i, j), val in self.arcs.items() if val > 0.5]
+        """Get tuple of active arcs in the solution"""
+        if self._active_arcs is None:
+            self._active_arcs = tuple((i, j) for (i, j), val in self._arcs.items() if val > 0.5)
+        return self._active_arcs
+    
+    @property
+    def c_arr(self):
+        """Distance matrix of the instance as a contiguous 2-D array, for vectorized lookups along routes"""
+        if self._c_arr is None:
+            c = self.instance['c']
+            if isinstance(c, dict):  # Legacy {(i, j): distance} instances
+                n = len(self.instance['x_coords'])
+                c_arr = np.zeros((n, n))
+                rows, cols = np.array(list(c.keys())).reshape(-1, 2).T
+                c_arr[rows, cols] = np.fromiter(c.values(), dtype=float, count=len(c))
+                c = c_arr
+            # Loaded instances already hold a C-ordered float32 matrix, which is used as is
+            self._c_arr = np.ascontiguousarray(c)
+        return self._c_arr
+    
+    @property
+    def q_arr(self):
+        """Demand of every node as a 1-D array, 0 at the depot"""
+        if self._q_arr is None:
+            q = self.instance['q']
+            if isinstance(q, dict):  # Legacy {node: demand} instances
+                q = [q.get(k, 0) for k in range(len(self.instance['x_coords']))]
+            self._q_arr = np.asarray(q)
+        return self._q_arr
     
     @property
     def routes(self):
-        """Extract and cache routes from solution arcs"""
+        """Extract and cache routes from solution arcs, as {route_id: int32 array [0, ..., 0]}"""
         if self._routes is None:
             self._extract_routes()
         return self._routes
@@ -41,56 +101,86 @@ class Solution:
     def metrics(self):
         """Calculate and cache solution metrics"""
         if self._metrics is None:
-            self._calculate_metrics()
+            self._metrics, emissions = self._compute_all()
+            self._emissions_cache[emissions['alpha'], emissions['beta']] = emissions
         return self._metrics
     
+    @property
+    def emissions(self):
+        """Calculate and cache the emissions metrics for the instance's parameters"""
+        return self.calculate_emissions()
+    
+    @property
+    def total_distance(self):
+        """Total distance over all routes"""
+        return self.metrics['total_distance']
+    
+    @property
+    def total_emissions(self):
+        """Total CO2 emissions over all routes (kg)"""
+        return self.emissions['total_emissions']
+    
     def _extract_routes(self):
         """Extract routes from solution arcs"""
         self._routes = {}
-        active_arcs = self.active_arcs
+        # Active arcs form cycles through the depot, each node has at most one successor
+        successors = {}
+        depot_outs = []
+        for from_node, to_node in self.active_arcs:
+            if from_node == 0:
+                depot_outs.append(to_node)
+            else:
+                successors[from_node] = to_node
         current_route_id = 1
-        remaining_arcs = active_arcs.copy()
         
-        while remaining_arcs:
-            # Start at depot
-            current_node = 0
-            route = [current_node]
-            
-            # Follow arcs until returning to depot
-            while current_node != 0 or len(route) == 1:
-                found_next = False
-                for i, (from_node, to_node) in enumerate(remaining_arcs):
-                    if from_node == current_node:
-                        route.append(to_node)
-                        current_node = to_node
-                        remaining_arcs.pop(i)
-                        found_next = True
-                        break
-                
-                if not found_next and current_node != 0:
-                    # If no outgoing arc found, return to depot
-                    route.append(0)
-                    break
+        for first_node in depot_outs:
+            # Follow arcs until returning to depot, each arc is used once
+            route = [0, first_node]
+            while route[-1] != 0:
+                # If no outgoing arc found, return to depot
+                route.append(successors.pop(route[-1], 0))
                     
             if len(route) > 2:  # Only include routes that visit at least one customer
-                self._routes[current_route_id] = route
+                # Stored as int32 arrays, indexed directly by the vectorized metrics and plotting
+                self._routes[current_route_id] = np.asarray(route, dtype=np.int32)
                 current_route_id += 1
         
         return self._routes
     
-    def _calculate_metrics(self):
-        """Calculate solution metrics"""
+    def _compute_all(self, alpha=0.15, beta=0.02):
+        """
+        Calculate the solution metrics and emissions in a single pass over the routes.
+        
+        Instance-specific emission parameters take precedence over alpha and beta.
+        Returns the metrics and emissions dictionaries.
+        """
+        alpha = self.instance.get('alpha', alpha)
+        beta = self.instance.get('beta', beta)
+        
         # Get problem parameters
-        c = self.instance['c']  # Cost/distance matrix
-        q = self.instance['q']  # Demand
+        c = self.c_arr  # Cost/distance matrix
+        q = self.q_arr  # Demand
         Q = self.instance['Q']  # Capacity
         
         route_details = []
+        route_emissions = {}
         total_distance = 0
+        total_emissions = 0
         
         for route_id, route in self.routes.items():
-            route_distance = sum(c[route[i], route[i+1]] for i in range(len(route)-1))
-            route_load = sum(q.get(node, 0) for node in route[1:-1])  # Skip depot
+            from_nodes = route[:-1]
+            
+            # Distance of each segment
+            distance = c[from_nodes, route[1:]]
+            
+            # For reverse logistics, we pick up at each node, the load on a
+            # segment is everything collected up to and including its start
+            current_load = np.cumsum(np.where(from_nodes != 0, q[from_nodes], 0))
+            
+            route_distance = float(distance.sum())
+            route_load = int(current_load[-1])  # Everything picked up before returning to the depot
+            # Base emissions + load-dependent emissions per segment
+            route_emission = float((distance * (alpha + beta * current_load)).sum())
             
             route_details.append({
                 'route_id': route_id,
@@ -98,68 +188,46 @@ class Solution:
                 'distance': route_distance,
                 'load': route_load,
                 'capacity': Q,
-                'num_shops': len(route) - 2  # -2 to exclude depot at start and end
+                'num_shops': route.size - 2  # -2 to exclude depot at start and end
             })
+            route_emissions[route_id] = route_emission
             
             total_distance += route_distance
+            total_emissions += route_emission
         
-        self._metrics = {
+        metrics = {
             'total_distance': total_distance,
             'num_routes': len(self.routes),
             'routes': route_details
         }
-        
-        return self._metrics
+        emissions = {
+            'total_emissions': total_emissions,
+            'route_emissions': route_emissions,
+            'alpha': alpha,
+            'beta': beta
+        }
+        return metrics, emissions
     
     def save_solution_files(self, csv_file='reverse_logistics_solution.csv', 
-                           details_file='solution_details.txt'):
-        """Save solution to CSV and details to text file"""
-        import pandas as pd
-        
-        result_folder = self.get_result_folder()  
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                           details_file='solution_details.txt', include_emissions=False):
+        """Save solution to CSV and details to text file, see format_summary for include_emissions"""
+        # One timestamp for the folder name and the report header
+        now = datetime.now()
+        result_folder = self.get_result_folder(now)  
 
         # Update file paths to use the results folder
         csv_path = os.path.join(result_folder, csv_file)
         details_path = os.path.join(result_folder, details_file)
 
         # Save solution to CSV
-        solution_df = pd.DataFrame(self.active_arcs, columns=['from', 'to'])
-        solution_df.to_csv(csv_path, index=False)
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['from', 'to'])
+            writer.writerows(self.active_arcs)
         
-        # Save route details to text file
+        # Save route details to text file, the report printed by print_summary in a single write
         with open(details_path, 'w', encoding='utf-8') as f:
-            f.write("FASHION REVERSE LOGISTICS SOLUTION ANALYSIS\n")
-            f.write("=========================================\n")
-            f.write(f"Solver: {self.instance.get('method_name', 'Unknown Method')}\n")
-            f.write(f"Generated on: {timestamp} \n")
-            f.write(f"Problem size: {len(self.instance['N'])} shops\n")
-            f.write(f"Vehicle capacity: {self.instance['Q']} units\n\n")
-            
-            f.write(f"Number of routes: {self.metrics['num_routes']}\n")
-            f.write(f"Total distance: {self.metrics['total_distance']:.2f} units\n\n")
-
-            # Calculate and print emissions if requested
-            emissions_info = self.calculate_emissions()
-            f.write(f"Estimated CO2 emissions: {emissions_info['total_emissions']:.2f} kg")
-
-            # Show detailed emissions info if solution was emissions-optimized
-            if self.instance.get('emissions_optimized', False):
-                f.write(f"Emissions parameters: \u03B1={emissions_info['alpha']} kg/km, \u03B2={emissions_info['beta']} kg/km/kg")
-            
-            for route_data in self.metrics['routes']:
-                route = route_data['sequence']
-                route_id = route_data['route_id']
-                
-                f.write(f"\nRoute {route_id}:")
-                f.write(f"  Sequence: {' -> '.join(map(str, route))}")
-                f.write(f"  Distance: {route_data['distance']:.2f} units")
-                f.write(f"  Load: {route_data['load']} / {route_data['capacity']} units")
-                f.write(f"  Shops visited: {route_data['num_shops']}")
-
-                # Add emissions info if available
-                if emissions_info['route_emissions'] and route_id in emissions_info['route_emissions']:
-                    f.write(f"  CO2 emissions: {emissions_info['route_emissions'][route_id]:.2f} kg")
+            f.write(self.format_summary(now, include_emissions).lstrip("\n") + "\n")
         
         print(f"\nSolution saved to '{csv_path}'")
         print(f"Solution details saved to '{details_path}'")
@@ -187,82 +255,73 @@ class Solution:
         alpha = self.instance.get('alpha', alpha)
         beta = self.instance.get('beta', beta)
         
-        # Get problem parameters
-        c = self.instance['c']  # Cost/distance matrix
-        q = self.instance['q']  # Demand
-        
-        route_emissions = {}
-        total_emissions = 0
-        
-        for route_id, route in self.routes.items():
-            current_load = 0
-            route_emission = 0
-            
-            for i in range(len(route)-1):
-                from_node = route[i]
-                to_node = route[i+1]
-                
-                # Distance between nodes
-                distance = c[(from_node, to_node)]
-                
-                # If not at depot, add load from this node
-                # For reverse logistics, we pick up at each node
-                if from_node != 0:
-                    current_load += q.get(from_node, 0)
-                
-                # Calculate emissions for this segment
-                # Base emissions + load-dependent emissions
-                segment_emissions = distance * (alpha + beta * current_load)
-                route_emission += segment_emissions
-            
-            route_emissions[route_id] = route_emission
-            total_emissions += route_emission
-        
-        return {
-            'total_emissions': total_emissions,
-            'route_emissions': route_emissions,
-            'alpha': alpha,
-            'beta': beta
-        }
+        # Emissions are computed alongside the metrics once per pair of parameters
+        key = (alpha, beta)
+        if key not in self._emissions_cache:
+            metrics, self._emissions_cache[key] = self._compute_all(alpha, beta)
+            if self._metrics is None:
+                self._metrics = metrics
+        return self._emissions_cache[key]
     
-    def print_summary(self):
-        """Print a summary of the solution"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        method_name = self.instance.get('method_name', 'Unknown Method')
-        
-        print("\nFASHION REVERSE LOGISTICS SOLUTION ANALYSIS")
-        print("=========================================")
-        print(f"Solver: {method_name}")
-        print(f"Generated on: {timestamp}")
-        print(f"Problem size: {len(self.instance['N'])} shops")
-        print(f"Vehicle capacity: {self.instance['Q']} units\n")
+    def format_summary(self, now=None, include_emissions=False):
+        """
+        Build the solution summary as a single string.
         
-        print(f"Number of routes: {self.metrics['num_routes']}")
-        print(f"Total distance: {self.metrics['total_distance']:.2f} units")
+        Parameters:
+        ----------
+        now : datetime, optional
+            Time the summary is generated at, the current time by default
+        include_emissions : bool
+            Report the estimated CO2 emissions, always done for emissions-optimized solutions
+        """
+        timestamp = (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        method_name = self.instance.get('method_name', 'Unknown Method')
         
-        # Calculate and print emissions if requested
-        emissions_info = self.calculate_emissions()
-        print(f"Estimated CO2 emissions: {emissions_info['total_emissions']:.2f} kg")
+        lines = [
+            "",
+            "FASHION REVERSE LOGISTICS SOLUTION ANALYSIS",
+            "=========================================",
+            f"Solver: {method_name}",
+            f"Generated on: {timestamp}",
+            f"Problem size: {len(self.instance['N'])} shops",
+            f"Vehicle capacity: {self.instance['Q']} units",
+            "",
+            f"Number of routes: {self.metrics['num_routes']}",
+            f"Total distance: {self.metrics['total_distance']:.2f} units",
+        ]
+        
+        # Calculate and add emissions if requested
+        emissions_optimized = self.instance.get('emissions_optimized', False)
+        emissions_info = self.emissions if include_emissions or emissions_optimized else None
+        if emissions_info is not None:
+            lines.append(f"Estimated CO2 emissions: {emissions_info['total_emissions']:.2f} kg")
         
         # Show detailed emissions info if solution was emissions-optimized
-        if self.instance.get('emissions_optimized', False):
-            print(f"Emissions parameters: α={emissions_info['alpha']} kg/km, β={emissions_info['beta']} kg/km/kg")
+        if emissions_optimized:
+            lines.append(f"Emissions parameters: α={emissions_info['alpha']} kg/km, β={emissions_info['beta']} kg/km/kg")
         
         for route_data in self.metrics['routes']:
             route = route_data['sequence']
             route_id = route_data['route_id']
             
-            print(f"\nRoute {route_id}:")
-            print(f"  Sequence: {' -> '.join(map(str, route))}")
-            print(f"  Distance: {route_data['distance']:.2f} units")
-            print(f"  Load: {route_data['load']} / {route_data['capacity']} units")
-            print(f"  Shops visited: {route_data['num_shops']}")
+            lines.append("")
+            lines.append(f"Route {route_id}:")
+            lines.append(f"  Sequence: {' -> '.join(map(str, route))}")
+            lines.append(f"  Distance: {route_data['distance']:.2f} units")
+            lines.append(f"  Load: {route_data['load']} / {route_data['capacity']} units")
+            lines.append(f"  Shops visited: {route_data['num_shops']}")
             
             # Add emissions info if available
-            if emissions_info['route_emissions'] and route_id in emissions_info['route_emissions']:
-                print(f"  CO2 emissions: {emissions_info['route_emissions'][route_id]:.2f} kg")
+            if emissions_info is not None and route_id in emissions_info['route_emissions']:
+                lines.append(f"  CO2 emissions: {emissions_info['route_emissions'][route_id]:.2f} kg")
+        
+        return "\n".join(lines)
+    
+    def print_summary(self, include_emissions=False):
+        """Print a summary of the solution, see format_summary for include_emissions"""
+        print(self.format_summary(include_emissions=include_emissions))
     
-    def visualize(self, output_file=None):
+    def visualize(self, output_file=None, dpi=300, pil_kwargs=None):
         """
         Visualize the solution
         
@@ -270,97 +329,106 @@ class Solution:
         ----------
         output_file : str
             Path to save the visualization
+        dpi : float
+            Resolution of the saved image
+        pil_kwargs : dict, optional
+            Options for the image writer, e.g. {'compress_level': 1} for a
+            faster, larger PNG
         """
-        import matplotlib.pyplot as plt
-        import numpy as np
-        from datetime import datetime
+        cm, FigureCanvasAgg, Figure, LineCollection = _plotting()
         
-        plt.figure(figsize=(12, 8))
+        # The figure is only ever saved, so it is drawn on an Agg canvas without
+        # going through pyplot, its GUI backend and its global figure manager
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
         
-        # Get coordinates
-        xc = self.instance['x_coords']
-        yc = self.instance['y_coords']
+        # Get coordinates, stacked once as (x, y) rows indexed by node
+        xy = np.column_stack([np.asarray(self.instance['x_coords'], dtype=np.float32),
+                              np.asarray(self.instance['y_coords'], dtype=np.float32)])
         
-        # Get current date and time for traceability
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Get current date and time for traceability, shared with the results folder
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
         method_name = self.instance.get('method_name', 'Unknown Method')
         
         # Plot depot as a red square
-        plt.plot(xc[0], yc[0], 'rs', markersize=10, label='Depot')
+        ax.plot(xy[0, 0], xy[0, 1], 'rs', markersize=10, label='Depot')
         
         # Plot shops as blue circles
-        plt.scatter(xc[1:], yc[1:], c='blue', marker='o', s=50, label='Shops')
+        ax.scatter(xy[1:, 0], xy[1:, 1], c='blue', marker='o', s=50, label='Shops')
         
         # Add shop numbers
-        for i in range(1, len(xc)):
-            plt.annotate(str(i), (xc[i], yc[i]), xytext=(5, 5), textcoords='offset points')
+        for i, point in enumerate(xy[1:].tolist(), start=1):
+            ax.annotate(str(i), point, xytext=(5, 5), textcoords='offset points')
         
         # Plot each route with different colors
-        colors = plt.cm.tab10(np.linspace(0, 1, len(self.routes)))
+        colors = cm.tab10(np.linspace(0, 1, len(self.routes)))
         
         for route_idx, (route_num, route) in enumerate(self.routes.items()):
-            # Plot connections between consecutive points in route
-            for i in range(len(route)-1):
-                from_node = route[i]
-                to_node = route[i+1]
-                
-                plt.plot([xc[from_node], xc[to_node]], [yc[from_node], yc[to_node]], 
-                         c=colors[route_idx], linewidth=2)
-                
-                # Add arrows to indicate direction
-                dx = xc[to_node] - xc[from_node]
-                dy = yc[to_node] - yc[from_node]
-                plt.arrow(xc[from_node] + 0.8*dx, yc[from_node] + 0.8*dy, 0.1*dx, 0.1*dy, 
-                        head_width=3, head_length=3, fc=colors[route_idx], ec=colors[route_idx])
+            # Connections between consecutive points in route as one (segments, 2, 2) array
+            starts = xy[route[:-1]]
+            ends = xy[route[1:]]
+            
+            # Plot all connections of the route as one artist, labelled for the legend
+            ax.add_collection(LineCollection(np.stack([starts, ends], axis=1), colors=[colors[route_idx]],
+                                             linewidths=2, label=f'Route {route_num}'))
             
-            # Add route to legend
-            plt.plot([], [], c=colors[route_idx], label=f'Route {route_num}')
+            # Add arrows to indicate direction, drawn over the last fifth of each connection
+            delta = ends - starts
+            arrow_starts = starts + 0.8 * delta
+            ax.quiver(arrow_starts[:, 0], arrow_starts[:, 1], 0.1 * delta[:, 0], 0.1 * delta[:, 1],
+                      color=colors[route_idx], angles='xy', scale_units='xy', scale=1,
+                      width=0.003, headwidth=6, headlength=6, headaxislength=5)
+        ax.autoscale_view()
         
         # Set up the main title with solution info
-        plt.title(f'Fashion Reverse Logistics Solution\n{method_name} | {timestamp}\n'
-                 f'Shops: {len(self.instance["N"])} | Total Distance: {self.metrics["total_distance"]:.2f} | Routes: {self.metrics["num_routes"]}',
-                 fontsize=12)
+        ax.set_title(f'Fashion Reverse Logistics Solution\n{method_name} | {timestamp}\n'
+                     f'Shops: {len(self.instance["N"])} | Total Distance: {self.metrics["total_distance"]:.2f} | Routes: {self.metrics["num_routes"]}',
+                     fontsize=12)
         
-        plt.xlabel('X coordinate')
-        plt.ylabel('Y coordinate')
-        plt.legend()
-        plt.grid(True)
+        ax.set_xlabel('X coordinate')
+        ax.set_ylabel('Y coordinate')
+        ax.legend()
+        ax.grid(True)
         
         # Add additional solution info as text in the bottom right
         info_text = f"Total distance: {self.metrics['total_distance']:.2f}\n"
         info_text += f"Number of routes: {self.metrics['num_routes']}\n"
         info_text += f"Vehicle capacity: {self.instance['Q']} units"
         
-        plt.figtext(0.95, 0.01, info_text, horizontalalignment='right', 
-                   verticalalignment='bottom', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        fig.text(0.95, 0.01, info_text, horizontalalignment='right', 
+                 verticalalignment='bottom', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         
         if output_file:
             # If output_file contains no directory, use a results folder
             if not os.path.dirname(output_file):
-                result_folder = self.get_result_folder()  
-                os.makedirs(result_folder, exist_ok=True)
+                result_folder = self.get_result_folder(now)  
                 output_file = os.path.join(result_folder, output_file)
             
-            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            fig.savefig(output_file, dpi=dpi, bbox_inches='tight', pil_kwargs=pil_kwargs)
             print(f"Route visualization saved to '{output_file}'")
-        
-        plt.close()
     
-    def get_result_folder(self):
+    def get_result_folder(self, now=None):
         """
         Get the results folder path for saving solution files.
         
+        Parameters:
+        ----------
+        now : datetime, optional
+            Time the folder is named after, the current time by default
+        
         Returns:
         -------
         str
             Path to the results folder
         """
         # Get current date and time for traceability
-        timestamp = datetime.now().strftime("%Y%m%d")
+        timestamp = (now or datetime.now()).strftime("%Y%m%d")
         method_name = self.instance.get('method_name', 'Unknown Method')
 
         # Create a folder for results with timestamp
-        result_folder = f"results\\results_{timestamp}_{method_name}"
+        result_folder = os.path.join("results", f"results_{timestamp}_{method_name}")
         os.makedirs(result_folder, exist_ok=True)
 
         return result_folder
\ No newline at end of file
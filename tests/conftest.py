@@ -0,0 +1,23 @@
+import os
+import pytest
+from src.data.data_handling import create_random_problem_instance
+
+# Keep matplotlib's font cache in the project so it is built once, not on every fresh
+# runner or home directory; set before any test imports matplotlib
+os.environ.setdefault("MPLCONFIGDIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".mplcache"))
+
+def pytest_configure(config):
+    """Register the markers used by the solver tests"""
+    config.addinivalue_line("markers", "solver: runs a full solve of one of the models")
+    # Also registered by pytest-xdist, declared here so runs without it do not warn
+    config.addinivalue_line("markers", "xdist_group(name): tests run by the same worker with --dist=loadgroup")
+
+@pytest.fixture(scope="session")
+def small_instance():
+    """Create a small deterministic instance for solver tests, shared by every test that only reads it"""
+    return create_random_problem_instance(5, 4, random_state=42)
+
+@pytest.fixture(scope="session")
+def small_instance_shops(small_instance):
+    """Shops of small_instance in ascending order, each to be visited exactly once"""
+    return sorted(small_instance['N'])
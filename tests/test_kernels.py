@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.models._kernels import (_reversal_split_cost, _try_reversal, route_costs_numba,
+                                 route_positions_numba, split_cost_numba)
+
+def random_tour_instance(seed, n=12, Q=10):
+    """Random giant tour from the depot with float32 costs and demands up to Q, so routes often close"""
+    rng = np.random.default_rng(seed)
+    coords = rng.random((n, 2)) * 100
+    C = np.sqrt(((coords[:, None] - coords[None, :]) ** 2).sum(axis=2)).astype(np.float32)
+    q = rng.integers(1, Q + 1, size=n).astype(np.int32)
+    q[0] = 0
+    tour = np.concatenate(([0], rng.permutation(np.arange(1, n)))).astype(np.int64)
+    return tour, C, Q, q
+
+# Costs are sums of float32 distances, accumulated in float32 when the kernels run as
+# plain Python without Numba and in a different order than the brute-force split
+RTOL = 1e-5
+
+def reversals(tour):
+    """Every segment tour[s:e + 1] of at least two shops, the depot at position 0 stays put"""
+    return [(s, e) for s in range(1, len(tour)) for e in range(s + 1, len(tour))]
+
+class TestKernels:
+    
+    @pytest.mark.parametrize("seed", range(20))
+    def test_reversal_split_cost(self, seed):
+        """Test the split cost of each reversal against splitting the reversed tour"""
+        tour, C, Q, q = random_tour_instance(seed)
+        route_of = route_positions_numba(tour, Q, q)
+        first_pos, cost_from = route_costs_numba(tour, C, route_of)
+    
+        for s, e in reversals(tour):
+            reversed_tour = np.concatenate((tour[:s], tour[s:e + 1][::-1], tour[e + 1:]))
+            expected = split_cost_numba(reversed_tour, C, Q, q)
+            cost = _reversal_split_cost(tour, C, Q, q, route_of, first_pos, cost_from, s, e)
+            assert cost == pytest.approx(expected, rel=RTOL), (s, e)
+    
+    @pytest.mark.parametrize("seed", range(20))
+    def test_try_reversal(self, seed):
+        """Test that each reversal kept or rejected by _try_reversal matches splitting the reversed tour"""
+        tour, C, Q, q = random_tour_instance(seed)
+        route_of = route_positions_numba(tour, Q, q)
+        first_pos, cost_from = route_costs_numba(tour, C, route_of)
+        best_cost = split_cost_numba(tour, C, Q, q)
+    
+        for s, e in reversals(tour):
+            reversed_tour = np.concatenate((tour[:s], tour[s:e + 1][::-1], tour[e + 1:]))
+            expected = split_cost_numba(reversed_tour, C, Q, q)
+    
+            # Every reversal is tried on the same tour, on copies of the kernel's in-place state
+            trial_tour, trial_route_of = tour.copy(), route_of.copy()
+            improved, cost = _try_reversal(trial_tour, trial_route_of, first_pos, cost_from,
+                                           C, Q, q, s, e, best_cost)
+    
+            if improved:
+                assert cost == pytest.approx(expected, rel=RTOL), (s, e)
+                assert trial_tour.tolist() == reversed_tour.tolist()
+                assert trial_route_of.tolist() == route_positions_numba(reversed_tour, Q, q).tolist()
+            else:
+                # Rejected, so no better than the current tour
+                assert expected >= best_cost or expected == pytest.approx(best_cost, rel=RTOL), (s, e)
+                assert cost == best_cost
+                assert trial_tour.tolist() == tour.tolist()
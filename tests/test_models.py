@@ -0,0 +1,55 @@
+import importlib
+from itertools import chain
+import pytest
+
+# Per case: (model module, model class, required solver package, solve() arguments,
+# whether the reported objective is the route distance)
+_MODEL_CASES = [
+    # A 5-shop instance solves in milliseconds, the limits only cap a misbehaving run
+    pytest.param('src.models.gurobi_model', 'GurobiModel', 'gurobipy',
+                 {'time_limit': 5, 'mip_gap': 0, 'node_limit': 10000}, True,
+                 id='gurobi', marks=pytest.mark.xdist_group("gurobi")),  # One worker holds the Gurobi license
+    # Seeded, and a few iterations are enough for a feasible solution on 5 shops
+    pytest.param('src.models.localSearch_model', 'localSearch_model', None,
+                 {'time_limit': 60, 'iterations': 5, 'random_state': 42}, True, id='heuristic'),
+    # Independent ILS runs in worker processes
+    pytest.param('src.models.localSearch_model', 'localSearch_model', None,
+                 {'time_limit': 60, 'iterations': 5, 'random_state': 42, 'n_workers': 2}, True,
+                 id='heuristic_parallel'),
+    # The routing model's objective sums arc costs truncated to hundredths, not the exact distance
+    pytest.param('src.models.ortools_model', 'ORToolsModel', 'ortools', {'time_limit': 5}, False, id='ortools'),
+]
+
+# The solver tests are independent, run them in parallel with pytest-xdist:
+#   python -m pytest -n auto --dist=loadgroup tests
+class TestModels:
+    
+    def _check_solution(self, instance, shops, model):
+        """Check that every shop is visited once and no route exceeds capacity"""
+        analysis = model.get_solution_object().metrics
+        
+        for route in analysis['routes']:
+            assert route['sequence'][0] == 0 and route['sequence'][-1] == 0
+            assert route['load'] <= instance['Q']
+        
+        # Sorted rather than a set so a shop visited twice is caught
+        visited_nodes = sorted(chain.from_iterable(route['sequence'][1:-1].tolist() for route in analysis['routes']))
+        assert visited_nodes == shops
+        return analysis
+    
+    @pytest.mark.solver
+    @pytest.mark.parametrize("module_name, class_name, package, solve_kwargs, objective_is_distance", _MODEL_CASES)
+    def test_model(self, small_instance, small_instance_shops, module_name, class_name, package,
+                   solve_kwargs, objective_is_distance):
+        """Test that each model solves the small instance to a feasible solution"""
+        if package:
+            pytest.importorskip(package, reason=f"{package} not available")
+        model_class = getattr(importlib.import_module(module_name), class_name)
+        
+        model = model_class(small_instance)
+        model.solve(**solve_kwargs)
+        
+        assert model.is_solved()
+        analysis = self._check_solution(small_instance, small_instance_shops, model)
+        if objective_is_distance:
+            assert analysis['total_distance'] == pytest.approx(model.get_objective_value(), rel=1e-4)
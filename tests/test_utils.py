@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from src.utils.solution import Solution
+
+# Route sequences of the hand-built solutions on the instance fixture
+ROUTES = ((0, 1, 2, 3, 0), (0, 5, 4, 0))
+OTHER_ROUTES = ((0, 1, 2, 0), (0, 3, 4, 5, 0))
+SINGLE_ROUTE = ((0, 1, 2, 3, 4, 5, 0),)
+
+def routes_to_arcs(routes):
+    """Active arcs {(i,j): 1} of a solution given as route sequences"""
+    return {(u, v): 1 for route in routes for u, v in zip(route, route[1:])}
+
+@pytest.fixture(scope="session")
+def instance():
+    """Five shops on a line, depot at the origin"""
+    x_coords = np.arange(6, dtype=float)
+    y_coords = np.zeros(6)
+    c = np.abs(x_coords[:, None] - x_coords[None, :]).astype(np.float32)
+    return {
+        'N': [1, 2, 3, 4, 5],
+        'V': [0, 1, 2, 3, 4, 5],
+        'x_coords': x_coords,
+        'y_coords': y_coords,
+        'c': c,
+        'Q': 5,
+        'q': np.array([0, 1, 2, 1, 2, 2], dtype=np.int32),
+    }
+
+@pytest.fixture(scope="session")
+def arcs():
+    """Arcs of ROUTES, plus an unused arc"""
+    return {**routes_to_arcs(ROUTES), (4, 5): 0}
+
+@pytest.fixture(scope="session")
+def solution(instance, arcs):
+    """Solution of ROUTES, shared so its routes, metrics and emissions are computed once"""
+    return Solution(instance, arcs)
+
+class TestSolution:
+    
+    @pytest.mark.parametrize("expected", [ROUTES, OTHER_ROUTES, SINGLE_ROUTE])
+    def test_routes(self, instance, expected):
+        """Test route extraction from the active arcs"""
+        solution = Solution(instance, routes_to_arcs(expected))
+        
+        assert tuple(tuple(route.tolist()) for route in solution.routes.values()) == expected
+        assert list(solution.routes) == list(range(1, len(expected) + 1))
+    
+    def test_set_arcs(self, instance, arcs):
+        """Test that assigning new arcs resets the derived routes and metrics"""
+        solution = Solution(instance, arcs)
+        assert solution.metrics['num_routes'] == 2
+        
+        solution.arcs = routes_to_arcs(OTHER_ROUTES)
+        
+        assert solution.active_arcs[:3] == ((0, 1), (1, 2), (2, 0))
+        assert tuple(tuple(route.tolist()) for route in solution.routes.values()) == OTHER_ROUTES
+        assert solution.total_distance == pytest.approx(14.0)
+    
+    def test_metrics(self, solution):
+        """Test distances and loads of the extracted routes"""
+        metrics = solution.metrics
+        
+        assert metrics['num_routes'] == 2
+        assert metrics['total_distance'] == pytest.approx(16.0)
+        assert [route['distance'] for route in metrics['routes']] == pytest.approx([6.0, 10.0])
+        assert [route['load'] for route in metrics['routes']] == [4, 4]
+    
+    def test_emissions(self, solution):
+        """Test emissions with the load picked up along each route"""
+        emissions = solution.calculate_emissions(alpha=0.1, beta=0.5)
+        
+        # Route 1 carries 0, 1, 3 and 4 units over segments of length 1, 1, 1 and 3
+        assert emissions['route_emissions'][1] == pytest.approx(6 * 0.1 + 0.5 * (0 + 1 + 3 + 4 * 3))
+        # Route 2 carries 0, 2 and 4 units over segments of length 5, 1 and 4
+        assert emissions['route_emissions'][2] == pytest.approx(10 * 0.1 + 0.5 * (0 * 5 + 2 * 1 + 4 * 4))
+        assert emissions['total_emissions'] == pytest.approx(sum(emissions['route_emissions'].values()))
+    
+    def test_summary_emissions(self, instance, arcs, solution):
+        """Test that the summary only reports emissions when requested or optimized for"""
+        assert "CO2" not in solution.format_summary()
+        assert "Estimated CO2 emissions" in solution.format_summary(include_emissions=True)
+        assert "CO2 emissions" in Solution(dict(instance, emissions_optimized=True), arcs).format_summary()
+    
+    def test_plot_solution(self, solution, tmp_path):
+        """Test that the route plot is written, headless on an Agg canvas"""
+        pytest.importorskip("matplotlib")
+        output_path = tmp_path / "solution.png"
+        
+        # Low resolution and light compression, only the plotting path is under test
+        solution.visualize(str(output_path), dpi=50, pil_kwargs={'compress_level': 1})
+        
+        # A single stat, raising FileNotFoundError if the plot was not written
+        assert output_path.stat().st_size > 0